@@ -4,6 +4,7 @@ from sqlalchemy import engine_from_config, pool
 from alembic import context
 from app.core.database import Base
 from app.uploads import models  # Import your models
+from app.transactions import models as transaction_models
 
 # Import all your models here to ensure they're registered
 # This is crucial for Alembic to detect your tables
@@ -0,0 +1,28 @@
+"""add upload_history uploaded_at index
+
+Revision ID: 5d2e8a41c7b9
+Revises: 3c51697bc11e
+Create Date: 2026-10-18 09:12:44.381905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8a41c7b9'
+down_revision: Union[str, Sequence[str], None] = '3c51697bc11e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_upload_history_uploaded_at_id', 'upload_history', ['uploaded_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_upload_history_uploaded_at_id', table_name='upload_history')
@@ -0,0 +1,85 @@
+"""create transactions table
+
+Revision ID: 6b0e4f2d8c13
+Revises: a7c3f19e4b26
+Create Date: 2026-10-18 21:14:05.271904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b0e4f2d8c13'
+down_revision: Union[str, Sequence[str], None] = 'a7c3f19e4b26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases set up before migrations existed already have the table
+    # (from create_all); fresh ones get it as the models first defined it
+    if sa.inspect(op.get_bind()).has_table('transactions'):
+        return
+
+    op.create_table('transactions',
+    sa.Column('transaction_id', sa.String(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('account_age_days', sa.Integer(), nullable=True),
+    sa.Column('customer_tier', sa.String(), nullable=True),
+    sa.Column('kyc_level', sa.String(), nullable=True),
+    sa.Column('has_multiple_accounts', sa.Boolean(), nullable=True),
+    sa.Column('linked_card_count', sa.Integer(), nullable=True),
+    sa.Column('transaction_amount', sa.Float(), nullable=True),
+    sa.Column('transaction_currency', sa.String(), nullable=True),
+    sa.Column('transaction_type', sa.String(), nullable=True),
+    sa.Column('merchant_category', sa.String(), nullable=True),
+    sa.Column('merchant_id', sa.String(), nullable=True),
+    sa.Column('merchant_risk_score', sa.Float(), nullable=True),
+    sa.Column('transaction_hour', sa.Integer(), nullable=True),
+    sa.Column('transaction_day_of_week', sa.Integer(), nullable=True),
+    sa.Column('is_weekend_transaction', sa.Boolean(), nullable=True),
+    sa.Column('is_nighttime_transaction', sa.Boolean(), nullable=True),
+    sa.Column('device_id', sa.String(), nullable=True),
+    sa.Column('device_os', sa.String(), nullable=True),
+    sa.Column('device_type', sa.String(), nullable=True),
+    sa.Column('is_vpn_used', sa.Boolean(), nullable=True),
+    sa.Column('is_proxy_used', sa.Boolean(), nullable=True),
+    sa.Column('ip_address', sa.String(), nullable=True),
+    sa.Column('ip_risk_score', sa.Float(), nullable=True),
+    sa.Column('location_country', sa.String(), nullable=True),
+    sa.Column('location_city', sa.String(), nullable=True),
+    sa.Column('is_new_device', sa.Boolean(), nullable=True),
+    sa.Column('is_new_location', sa.Boolean(), nullable=True),
+    sa.Column('num_failed_attempts_24h', sa.Integer(), nullable=True),
+    sa.Column('prev_avg_txn_amount', sa.Float(), nullable=True),
+    sa.Column('txn_amount_deviation', sa.Float(), nullable=True),
+    sa.Column('daily_avg_spend', sa.Float(), nullable=True),
+    sa.Column('total_spend_last_7d', sa.Float(), nullable=True),
+    sa.Column('transaction_recency', sa.Float(), nullable=True),
+    sa.Column('txn_velocity_1h', sa.Float(), nullable=True),
+    sa.Column('txn_velocity_24h', sa.Float(), nullable=True),
+    sa.Column('transaction_success_rate_24h', sa.Float(), nullable=True),
+    sa.Column('has_multiple_devices', sa.Boolean(), nullable=True),
+    sa.Column('is_blacklisted_card', sa.Boolean(), nullable=True),
+    sa.Column('is_blacklisted_device', sa.Boolean(), nullable=True),
+    sa.Column('is_high_risk_country', sa.Boolean(), nullable=True),
+    sa.Column('distance_from_last_transaction', sa.Float(), nullable=True),
+    sa.Column('has_chargeback_history', sa.Boolean(), nullable=True),
+    sa.Column('previous_fraudulent_activity', sa.Boolean(), nullable=True),
+    sa.Column('account_fraud_reported', sa.Boolean(), nullable=True),
+    sa.Column('is_high_risk_behavior', sa.Boolean(), nullable=True),
+    sa.Column('label', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('transaction_id')
+    )
+    op.create_index(op.f('ix_transactions_transaction_id'), 'transactions', ['transaction_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_transactions_transaction_id'), table_name='transactions')
+    op.drop_table('transactions')
@@ -0,0 +1,30 @@
+"""add upload_history content_sha256
+
+Revision ID: a7c3f19e4b26
+Revises: 5d2e8a41c7b9
+Create Date: 2026-10-18 11:02:17.530418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3f19e4b26'
+down_revision: Union[str, Sequence[str], None] = '5d2e8a41c7b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('upload_history', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_upload_history_content_sha256'), 'upload_history', ['content_sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_upload_history_content_sha256'), table_name='upload_history')
+    op.drop_column('upload_history', 'content_sha256')
@@ -0,0 +1,30 @@
+"""add transactions upload_id
+
+Revision ID: b94d2c7e1f03
+Revises: 6b0e4f2d8c13
+Create Date: 2026-10-18 13:40:52.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b94d2c7e1f03'
+down_revision: Union[str, Sequence[str], None] = '6b0e4f2d8c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transactions', sa.Column('upload_id', sa.String(length=36), nullable=True))
+    op.create_index(op.f('ix_transactions_upload_id'), 'transactions', ['upload_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_transactions_upload_id'), table_name='transactions')
+    op.drop_column('transactions', 'upload_id')
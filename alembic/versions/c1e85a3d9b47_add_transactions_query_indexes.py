@@ -0,0 +1,42 @@
+"""add transactions query indexes
+
+Revision ID: c1e85a3d9b47
+Revises: b94d2c7e1f03
+Create Date: 2026-10-18 14:55:09.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1e85a3d9b47'
+down_revision: Union[str, Sequence[str], None] = 'b94d2c7e1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = {
+    'ix_transactions_timestamp_transaction_id': ['timestamp', 'transaction_id'],
+    'ix_transactions_user_id_timestamp': ['user_id', 'timestamp', 'transaction_id'],
+    'ix_transactions_device_id_timestamp': ['device_id', 'timestamp', 'transaction_id'],
+    'ix_transactions_merchant_id_timestamp': ['merchant_id', 'timestamp', 'transaction_id'],
+    'ix_transactions_label_timestamp': ['label', 'timestamp', 'transaction_id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the table writable while the indexes build on PostgreSQL
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'transactions', columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='transactions', postgresql_concurrently=True)
@@ -0,0 +1,59 @@
+"""add transaction rollup tables
+
+Revision ID: d3a6f08c52e1
+Revises: c1e85a3d9b47
+Create Date: 2026-10-18 16:21:37.845290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a6f08c52e1'
+down_revision: Union[str, Sequence[str], None] = 'c1e85a3d9b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ROLLUPS = {
+    'user_rollups': 'user_id',
+    'device_rollups': 'device_id',
+    'merchant_rollups': 'merchant_id',
+}
+
+# Sort columns of the rollup listing; each gets a (sort DESC, key) index
+SORTS = ['transaction_count', 'amount_sum', 'label_sum']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, key in ROLLUPS.items():
+        op.create_table(table,
+        sa.Column(key, sa.String(), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.Column('amount_sum', sa.Float(), nullable=False),
+        sa.Column('label_sum', sa.Float(), nullable=False),
+        sa.Column('first_seen', sa.DateTime(), nullable=True),
+        sa.Column('last_seen', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint(key)
+        )
+
+        # Backfill from the rows already stored; ingest keeps them current from here on
+        op.execute(
+            f"INSERT INTO {table} ({key}, transaction_count, amount_sum, label_sum, first_seen, last_seen) "
+            f"SELECT {key}, COUNT(*), COALESCE(SUM(transaction_amount), 0), COALESCE(SUM(label), 0), "
+            f"MIN(timestamp), MAX(timestamp) "
+            f"FROM transactions WHERE {key} IS NOT NULL GROUP BY {key}"
+        )
+
+        for sort in SORTS:
+            op.create_index(f'ix_{table}_{sort}', table, [sa.text(f'{sort} DESC'), key], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ROLLUPS:
+        op.drop_table(table)
@@ -0,0 +1,119 @@
+"""partition transactions by month
+
+Revision ID: e82b5c1f9a64
+Revises: d3a6f08c52e1
+Create Date: 2026-10-18 17:48:12.306518
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e82b5c1f9a64'
+down_revision: Union[str, Sequence[str], None] = 'd3a6f08c52e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = {
+    'ix_transactions_transaction_id': ['transaction_id'],
+    'ix_transactions_upload_id': ['upload_id'],
+    'ix_transactions_timestamp_transaction_id': ['timestamp', 'transaction_id'],
+    'ix_transactions_user_id_timestamp': ['user_id', 'timestamp', 'transaction_id'],
+    'ix_transactions_device_id_timestamp': ['device_id', 'timestamp', 'transaction_id'],
+    'ix_transactions_merchant_id_timestamp': ['merchant_id', 'timestamp', 'transaction_id'],
+    'ix_transactions_label_timestamp': ['label', 'timestamp', 'transaction_id'],
+}
+
+
+# Monthly partitions created ahead of the current month; startup adds later
+# ones per TRANSACTIONS_PARTITION_MONTHS_AHEAD
+MONTHS_AHEAD = 3
+
+
+def _enabled() -> bool:
+    # PostgreSQL always gets the partitioned table; SQLite keeps the single table
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _enabled():
+        return
+    bind = op.get_bind()
+
+    # Every row needs a month to live in; refuse rather than leave rows behind
+    missing = bind.execute(sa.text("SELECT COUNT(*) FROM transactions WHERE timestamp IS NULL")).scalar()
+    if missing:
+        raise RuntimeError(
+            f"{missing} transactions have no timestamp and cannot be placed in a monthly partition; "
+            "set or delete them, then rerun the migration"
+        )
+
+    op.execute("ALTER TABLE transactions RENAME TO transactions_unpartitioned")
+    op.execute("ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT transactions_pkey TO transactions_unpartitioned_pkey")
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    # Uniqueness on a partitioned table must include the partition key
+    op.execute(
+        "CREATE TABLE transactions (LIKE transactions_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (timestamp)"
+    )
+    op.execute("ALTER TABLE transactions ALTER COLUMN timestamp SET NOT NULL")
+    op.execute("ALTER TABLE transactions ADD PRIMARY KEY (transaction_id, timestamp)")
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+
+    # One partition per month of existing data, through MONTHS_AHEAD months from now
+    first, last = bind.execute(sa.text("SELECT MIN(timestamp), MAX(timestamp) FROM transactions_unpartitioned")).one()
+    now = datetime.utcnow()
+    month = date((first or now).year, (first or now).month, 1)
+    end = date(now.year, now.month, 1)
+    for _ in range(MONTHS_AHEAD):
+        end = _next_month(end)
+    if last is not None:
+        end = max(end, date(last.year, last.month, 1))
+    while month <= end:
+        op.execute(
+            f"CREATE TABLE transactions_y{month.year}m{month.month:02d} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        )
+        month = _next_month(month)
+
+    op.execute("INSERT INTO transactions SELECT * FROM transactions_unpartitioned")
+
+    # Created on the parent, so every partition gets its own copy
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'transactions', columns, unique=False)
+
+    op.drop_table('transactions_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not _enabled():
+        return
+
+    op.execute("ALTER TABLE transactions RENAME TO transactions_partitioned")
+    op.execute("ALTER TABLE transactions_partitioned RENAME CONSTRAINT transactions_pkey TO transactions_partitioned_pkey")
+
+    op.execute("CREATE TABLE transactions (LIKE transactions_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE transactions ALTER COLUMN timestamp DROP NOT NULL")
+    op.execute("ALTER TABLE transactions ADD PRIMARY KEY (transaction_id)")
+    # An ID stored under two timestamps keeps its earliest row
+    op.execute(
+        "INSERT INTO transactions SELECT * FROM transactions_partitioned "
+        "ORDER BY timestamp ON CONFLICT (transaction_id) DO NOTHING"
+    )
+    op.execute("DROP TABLE transactions_partitioned CASCADE")
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'transactions', columns, unique=False)
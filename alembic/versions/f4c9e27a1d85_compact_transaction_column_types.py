@@ -0,0 +1,80 @@
+"""compact transaction column types
+
+Revision ID: f4c9e27a1d85
+Revises: e82b5c1f9a64
+Create Date: 2026-10-18 19:02:44.518930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c9e27a1d85'
+down_revision: Union[str, Sequence[str], None] = 'e82b5c1f9a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same columns as models.ENUM_COLUMNS; each gets a <column>_enum type holding
+# these labels plus any already stored. Ingest rejects other labels.
+ENUM_LABELS = {
+    'customer_tier': ['Bronze', 'Silver', 'Gold', 'Platinum'],
+    'kyc_level': ['Level0', 'Level1', 'Level2', 'Level3'],
+    'transaction_type': ['Purchase', 'Withdrawal', 'Transfer', 'Refund', 'Payment'],
+    'device_os': ['Android', 'iOS', 'Windows', 'macOS', 'Linux', 'Other'],
+    'device_type': ['Mobile', 'Desktop', 'Tablet'],
+}
+ENUM_COLUMNS = list(ENUM_LABELS)
+
+SMALLINT_COLUMNS = ['transaction_hour', 'transaction_day_of_week']
+
+
+def _quote(label: str) -> str:
+    return "'" + label.replace("'", "''") + "'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite stores these as text and integers either way
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # Known labels first, then any other label already stored, so no row is lost
+    for column, labels in ENUM_LABELS.items():
+        stored = bind.execute(sa.text(
+            f"SELECT DISTINCT {column} FROM transactions WHERE {column} IS NOT NULL ORDER BY {column}"
+        )).scalars().all()
+        labels = labels + [label for label in stored if label not in labels]
+        op.execute(f"CREATE TYPE {column}_enum AS ENUM ({', '.join(_quote(label) for label in labels)})")
+
+    # Stored IPs that are not valid addresses become NULL instead of failing the migration
+    op.execute(
+        "CREATE FUNCTION pg_temp.to_inet(value text) RETURNS inet AS $$ "
+        "BEGIN RETURN value::inet; EXCEPTION WHEN others THEN RETURN NULL; END "
+        "$$ LANGUAGE plpgsql IMMUTABLE"
+    )
+
+    # One ALTER TABLE so the table is rewritten once, not once per column
+    changes = [f"ALTER COLUMN {column} TYPE {column}_enum USING {column}::{column}_enum" for column in ENUM_COLUMNS]
+    changes += [f"ALTER COLUMN {column} TYPE SMALLINT" for column in SMALLINT_COLUMNS]
+    changes.append("ALTER COLUMN ip_address TYPE INET USING pg_temp.to_inet(ip_address)")
+    op.execute(f"ALTER TABLE transactions {', '.join(changes)}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    changes = [f"ALTER COLUMN {column} TYPE VARCHAR USING {column}::text" for column in ENUM_COLUMNS]
+    changes += [f"ALTER COLUMN {column} TYPE INTEGER" for column in SMALLINT_COLUMNS]
+    changes.append("ALTER COLUMN ip_address TYPE VARCHAR USING host(ip_address)")
+    op.execute(f"ALTER TABLE transactions {', '.join(changes)}")
+
+    for column in ENUM_COLUMNS:
+        op.execute(f"DROP TYPE {column}_enum")
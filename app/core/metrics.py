@@ -0,0 +1,180 @@
+import io
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Upper bounds of the rows-per-second histogram buckets
+THROUGHPUT_BUCKETS = (100, 1000, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000)
+
+# name -> (type, help text, buckets)
+_metrics = {}
+
+# (name, sorted label pairs) -> value, or [bucket counts..., sum, count] for histograms
+_values = {}
+_lock = threading.Lock()
+
+
+def register(name: str, kind: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+    """
+    Declares a "counter" or "histogram" so it is rendered with HELP/TYPE lines.
+    """
+    _metrics[name] = (kind, help_text, buckets)
+
+
+def inc(name: str, value: float = 1, **labels):
+    """
+    Adds value to a counter.
+    """
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _values[key] = _values.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels):
+    """
+    Records one observation in a histogram.
+    """
+    buckets = _metrics[name][2]
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        counts = _values.setdefault(key, [0] * (len(buckets) + 2))
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+
+def render() -> str:
+    """
+    Every registered metric in the Prometheus text exposition format.
+    """
+    with _lock:
+        values = {key: list(value) if isinstance(value, list) else value for key, value in _values.items()}
+
+    lines = []
+    for name, (kind, help_text, buckets) in _metrics.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (metric, labels), value in sorted(values.items()):
+            if metric != name:
+                continue
+            if kind == "counter":
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+            for bound, count in zip(buckets, value):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {value[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """
+    Drops every recorded value; registrations are kept.
+    """
+    with _lock:
+        _values.clear()
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class StageTimer:
+    """
+    Adds up wall-clock seconds per pipeline stage for one upload. Stages
+    nest exclusively: time spent in an inner stage (e.g. "read" inside
+    "parse") is not counted again in the outer one.
+    """
+
+    def __init__(self):
+        self._seconds = defaultdict(float)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._since = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        stack = self._local.__dict__.setdefault("stack", [])
+        start = time.perf_counter()
+        stack.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self._seconds[name] += elapsed - nested
+
+    def flush_into(self, *timings: dict):
+        """
+        Adds the seconds gathered since the last flush, plus their wall-clock
+        span as "total", to each of the given dicts.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            seconds, self._seconds = self._seconds, defaultdict(float)
+            seconds["total"] += now - self._since
+            self._since = now
+        for target in timings:
+            for name, value in seconds.items():
+                target[name] = target.get(name, 0.0) + value
+
+
+class TimedFile(io.BufferedIOBase):
+    """
+    Binary file proxy that books the time spent in read calls to a stage.
+    Closing it leaves the wrapped file open.
+    """
+
+    def __init__(self, file_obj, timer: StageTimer, stage: str):
+        self._file = file_obj
+        self._timer = timer
+        self._stage = stage
+
+    def read(self, size: int = -1) -> bytes:
+        with self._timer.stage(self._stage):
+            return self._file.read(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        with self._timer.stage(self._stage):
+            return self._file.read1(size) if hasattr(self._file, "read1") else self._file.read(size)
+
+    def readinto(self, buffer) -> int:
+        with self._timer.stage(self._stage):
+            return self._file.readinto(buffer)
+
+    def readline(self, size: int = -1) -> bytes:
+        with self._timer.stage(self._stage):
+            return self._file.readline(size)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._file.seekable()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
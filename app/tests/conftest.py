@@ -7,10 +7,11 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import Session
 
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_session_factory
 from main import app
 from fastapi.testclient import TestClient
 from app.uploads import models
+from app.uploads.services import clear_transaction_id_cache
 
 
 # import sys
@@ -33,6 +34,14 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 Base.metadata.create_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def transaction_id_cache():
+    """Each test rolls its rows back, so cached IDs must not outlive it."""
+    clear_transaction_id_cache()
+    yield
+    clear_transaction_id_cache()
+
+
 @pytest.fixture
 def db_session():
     """Create a clean database session for each test."""
@@ -48,6 +57,9 @@ def db_session():
             pass  # No closing here, handled in fixture teardown
     
     app.dependency_overrides[get_db] = override_get_db
+
+    # Background uploads get their own sessions on the same connection
+    app.dependency_overrides[get_session_factory] = lambda: (lambda: TestingSessionLocal(bind=connection))
     
     yield session
     
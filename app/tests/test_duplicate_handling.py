@@ -106,4 +106,134 @@ def test_mixed_duplicate_and_new_transactions(client, db_session: Session):
     
     # Verify transaction 102 was created
     transaction_102 = db_session.query(models.Transaction).filter_by(transaction_id="102").first()
-    assert transaction_102 is not None
\ No newline at end of file
+    assert transaction_102 is not None
+
+
+# Duplicate counts come from the database insert
+def test_duplicate_counts_reported(client, db_session: Session):
+    """Test that rows skipped by the database are reported as duplicates"""
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    row = "{},2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+
+    csv_content1 = header + "\n".join(row.format(i) for i in ["300", "301"])
+    csv_content2 = header + "\n".join(row.format(i) for i in ["300", "301", "302"])
+
+    file1 = {"file": ("counts1.csv", io.BytesIO(csv_content1.encode("utf-8")), "text/csv")}
+    response1 = client.post("/api/v1/uploads/csv/", files=file1)
+    assert response1.status_code == 201
+    assert response1.json()["data"]["successful_rows"] == 2
+
+    file2 = {"file": ("counts2.csv", io.BytesIO(csv_content2.encode("utf-8")), "text/csv")}
+    response2 = client.post("/api/v1/uploads/csv/", files=file2)
+    assert response2.status_code == 201
+    data = response2.json()["data"]
+    assert data["successful_rows"] == 1
+    assert data["duplicate_rows"] == 2
+    assert data["failed_rows"] == 0
+
+    transaction_count = db_session.query(models.Transaction).count()
+    assert transaction_count == 3, f"Expected 3 transactions, got {transaction_count}"
+
+
+
+# Duplicates inside a single file
+@pytest.mark.parametrize("keep,expected_amount", [("first", 10.0), ("last", 30.0)])
+def test_in_file_duplicates(client, db_session: Session, keep, expected_amount):
+    """Test that a transaction_id repeated within one file is kept once and reported"""
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    row = "{},2025-08-28 12:00:00,101,30,Gold,Level1,0,1,{},USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+    csv_content = header + "\n".join([row.format("400", 10.0), row.format("401", 20.0), row.format("400", 30.0)])
+
+    file = {"file": ("in_file.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")}
+    response = client.post(f"/api/v1/uploads/csv/?keep={keep}", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["successful_rows"] == 2
+    assert data["in_file_duplicate_rows"] == 1
+    assert data["failed_rows"] == 0
+
+    transaction = db_session.query(models.Transaction).filter_by(transaction_id="400").first()
+    assert transaction.transaction_amount == expected_amount
+
+    upload = db_session.query(models.UploadHistory).filter_by(upload_id=data["upload_id"]).first()
+    assert upload.details["in_file_duplicates"] == 1
+    assert upload.details["in_file_duplicate_ids"] == ["400"]
+
+
+# Repeats in later chunks are in-file duplicates too
+def test_in_file_duplicates_across_chunks(client, db_session: Session, monkeypatch):
+    """Test that recent IDs are tracked across chunks, and that keep=last rejects a multi-chunk file"""
+    from app.uploads import readers
+    monkeypatch.setattr(readers, "CSV_CHUNK_SIZE", 2)
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    row = "{},2025-08-28 12:00:00,101,30,Gold,Level1,0,1,{},USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+    csv_content = header + "\n".join([row.format("410", 10.0), row.format("411", 20.0), row.format("410", 30.0)])
+
+    file = {"file": ("chunks_first.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/?keep=first", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["successful_rows"] == 2
+    assert data["in_file_duplicate_rows"] == 1
+    assert data["duplicate_rows"] == 0
+    assert db_session.query(models.Transaction).filter_by(transaction_id="410").first().transaction_amount == 10.0
+
+    # A repeat older than the window is still skipped, by the database, as a duplicate
+    from app.uploads import services
+    monkeypatch.setattr(services, "IN_FILE_DEDUP_WINDOW", 1)
+    csv_content = header + "\n".join([row.format("430", 10.0), row.format("431", 20.0), row.format("430", 30.0)])
+    file = {"file": ("chunks_window.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/?keep=first", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["successful_rows"] == 2
+    assert data["in_file_duplicate_rows"] == 0
+    assert data["duplicate_rows"] == 1
+    assert db_session.query(models.Transaction).filter_by(transaction_id="430").first().transaction_amount == 10.0
+
+    csv_content = header + "\n".join([row.format("420", 10.0), row.format("421", 20.0), row.format("420", 30.0)])
+    file = {"file": ("chunks_last.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/?keep=last", files=file)
+    assert response.status_code == 400
+    assert "keep=last" in response.json()["message"]
+
+
+# Rows committed by an earlier upload are skipped from the ID cache
+def test_transaction_id_cache(client, db_session: Session):
+    """Test that re-sent rows are answered by the cache, and that it warms from stored rows"""
+    from app.uploads.services import clear_transaction_id_cache
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    row = "{},2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+
+    def upload(name, ids):
+        content = header + "\n".join(row.format(i) for i in ids)
+        file = {"file": (name, io.BytesIO(content.encode("utf-8")), "text/csv")}
+        response = client.post("/api/v1/uploads/csv/", files=file)
+        assert response.status_code == 201
+        return response.json()["data"]
+
+    upload("day1.csv", ["500", "501", "502"])
+    assert client.get("/health").json()["transaction_id_cache"]["misses"] == 3
+
+    data = upload("day2.csv", ["501", "502", "503"])
+    assert data["duplicate_rows"] == 2
+    assert data["successful_rows"] == 1
+    cache = client.get("/health").json()["transaction_id_cache"]
+    assert cache["hits"] == 2
+    assert cache["size"] == 4
+
+    # After a restart the cache is refilled from the stored rows
+    clear_transaction_id_cache()
+    data = upload("day3.csv", ["500", "503", "504"])
+    assert data["duplicate_rows"] == 2
+    assert data["successful_rows"] == 1
+    assert client.get("/health").json()["transaction_id_cache"]["hits"] == 2
+    assert db_session.query(models.Transaction).count() == 5
+
+    # A cached key whose row was deleted is not trusted: the row is inserted again
+    db_session.query(models.Transaction).filter_by(transaction_id="504").delete()
+    data = upload("day4.csv", ["504"])
+    assert data["successful_rows"] == 1
+    assert data["duplicate_rows"] == 0
+    assert client.get("/health").json()["transaction_id_cache"]["stale"] == 1
+    assert db_session.query(models.Transaction).count() == 5
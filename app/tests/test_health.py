@@ -0,0 +1,9 @@
+# Health check runs a real query and reports pool metrics
+def test_health_check(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert data["database"] == "connected"
+    assert "checkouts" in data["pool"]
+    assert "wait_time_avg" in data["pool"]
@@ -0,0 +1,61 @@
+import io
+import gzip
+from app.core import metrics
+from app.uploads import models
+
+
+HEADER = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+ROW = "{},2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,{},Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+
+
+# Counters and stage histograms are served in the Prometheus text format
+def test_metrics_endpoint(client):
+    metrics.reset()
+    content = HEADER + "\n".join([ROW.format("m1", 12), ROW.format("m2", 12), ROW.format("m1", 12), ROW.format("m3", 25)])
+    file = {"file": ("metrics.csv.gz", io.BytesIO(gzip.compress(content.encode("utf-8"))), "application/gzip")}
+    assert client.post("/api/v1/uploads/csv/", files=file).status_code == 201
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert "# TYPE csvup_ingest_rows_total counter" in text
+    assert 'csvup_ingest_rows_total{outcome="parsed"} 4' in text
+    assert 'csvup_ingest_rows_total{outcome="inserted"} 2' in text
+    assert 'csvup_ingest_rows_total{outcome="in_file_duplicate"} 1' in text
+    assert 'csvup_ingest_rows_total{outcome="failed"} 1' in text
+    assert 'csvup_ingest_invalid_rows_total{check="transaction_hour outside 0-23"} 1' in text
+    assert 'csvup_uploads_total{status="partial"} 1' in text
+    assert "# TYPE csvup_ingest_stage_seconds histogram" in text
+    for stage in ("read", "decode", "parse", "validate", "dedup", "materialize", "flush", "commit"):
+        assert f'csvup_ingest_stage_seconds_count{{stage="{stage}"}}' in text
+    assert 'csvup_ingest_batch_seconds_count{method="insert"} 1' in text
+    assert 'csvup_ingest_stage_seconds_bucket{stage="parse",le="+Inf"}' in text
+    assert "csvup_upload_rows_per_second_count 1" in text
+
+
+# Each upload keeps a summary of its stage timings
+def test_upload_timings_stored(client, db_session):
+    content = HEADER + "\n".join(ROW.format(f"t{i}", 12) for i in range(3))
+    file = {"file": ("timings.csv", io.BytesIO(content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+
+    record = db_session.query(models.UploadHistory).filter_by(upload_id=response.json()["data"]["upload_id"]).first()
+    timings = record.details["timings"]
+    for stage in ("read", "parse", "validate", "dedup", "materialize", "flush", "commit", "total"):
+        assert timings[stage] >= 0
+    assert timings["total"] >= timings["parse"]
+    assert record.details["rows_per_second"] > 0
+
+
+# Nested stages are not counted twice
+def test_stage_timer_is_exclusive():
+    timer = metrics.StageTimer()
+    with timer.stage("parse"):
+        with timer.stage("read"):
+            sum(range(100000))
+    timings = {}
+    timer.flush_into(timings)
+    assert timings["read"] > 0
+    assert timings["parse"] + timings["read"] <= timings["total"]
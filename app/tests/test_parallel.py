@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.uploads import models
+from app.uploads.parallel import split_byte_ranges, ingest_parallel
+from app.uploads.services import checkpoint_upload, create_upload_record, get_transaction_id_cache_metrics
+
+
+HEADER = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+ROW = "p{},2025-08-28 12:00:00,user{},30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev1,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0\n"
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "parallel.csv"
+    path.write_text(HEADER + "".join(ROW.format(i, i) for i in range(200)))
+    return str(path)
+
+
+# Byte ranges are newline-aligned and cover every row once
+def test_split_byte_ranges(csv_path):
+    header, ranges = split_byte_ranges(csv_path, 4)
+    assert header.decode("utf-8") == HEADER
+    assert len(ranges) == 4
+
+    with open(csv_path, "rb") as f:
+        data = f.read()
+    assert ranges[0][0] == len(header)
+    assert ranges[-1][1] == len(data)
+
+    rows = []
+    for (start, end), (next_start, _) in zip(ranges, ranges[1:] + [(len(data), None)]):
+        assert end == next_start
+        assert data[start - 1:start] == b"\n"
+        rows.extend(data[start:end].decode("utf-8").splitlines())
+    assert rows == [ROW.format(i, i).strip() for i in range(200)]
+
+
+# More parts than rows
+def test_split_byte_ranges_small_file(tmp_path):
+    path = tmp_path / "small.csv"
+    path.write_text(HEADER + ROW.format(0, 0))
+    _, ranges = split_byte_ranges(str(path), 8)
+    assert len(ranges) == 1
+
+
+# Workers insert their ranges and counts land on one UploadHistory row
+def test_ingest_parallel(csv_path, tmp_path, monkeypatch):
+    from app.uploads import parallel
+    checkpoints = []
+
+    def counted_checkpoint(*args):
+        checkpoints.append(args)
+        checkpoint_upload(*args)
+
+    monkeypatch.setattr(parallel, "PARALLEL_HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(parallel, "checkpoint_upload", counted_checkpoint)
+    database_url = f"sqlite:///{tmp_path / 'parallel.db'}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        upload_record = create_upload_record("parallel.csv", db)
+        result = ingest_parallel(csv_path, upload_record, db, workers=2, database_url=database_url)
+
+        assert result["total_rows"] == 200
+        assert result["successful_rows"] == 200
+        assert result["failed_rows"] == 0
+        assert db.query(models.Transaction).count() == 200
+
+        db.refresh(upload_record)
+        assert upload_record.status == "success"
+        assert upload_record.rows_processed == 200
+
+        # Besides one checkpoint per range, heartbeats landed while workers ran
+        assert len(checkpoints) > len(split_byte_ranges(csv_path, 2)[1])
+
+        # The parent's ID cache learned the rows the workers inserted
+        assert get_transaction_id_cache_metrics()["size"] == 200
+    finally:
+        db.close()
+        engine.dispose()
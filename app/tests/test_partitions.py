@@ -0,0 +1,60 @@
+from datetime import date
+from contextlib import nullcontext
+from types import SimpleNamespace
+import pytest
+import pandas as pd
+from app.uploads import models
+from app.uploads.partitions import (
+    months_between, next_month, partition_ddl, partition_name, ensure_partitions_for, check_partitioning,
+    detach_partition,
+)
+from app.uploads.services import get_transaction_id_cache_metrics, remember_transaction_ids
+
+
+# Months roll over the year boundary and bound each partition half-open
+def test_partition_bounds():
+    assert next_month(date(2025, 12, 1)) == date(2026, 1, 1)
+    assert months_between(date(2025, 11, 17), date(2026, 2, 3)) == [
+        date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)
+    ]
+    assert partition_name(date(2025, 8, 1)) == "transactions_y2025m08"
+    assert partition_ddl(date(2025, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS transactions_y2025m12 PARTITION OF transactions "
+        "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+    )
+
+
+# SQLite keeps the single table keyed on transaction_id alone
+def test_sqlite_is_not_partitioned(db_session):
+    assert not models.TRANSACTIONS_PARTITIONED
+    assert models.TRANSACTION_CONFLICT_COLUMNS == ["transaction_id"]
+    assert [column.name for column in models.Transaction.__table__.primary_key] == ["transaction_id"]
+    assert models.Transaction.__table__.dialect_options["postgresql"]["partition_by"] is None
+
+    # No DDL is issued when partitioning is off
+    ensure_partitions_for(pd.Series(pd.to_datetime(["2025-08-28 12:00:00"])), db_session.get_bind().engine)
+
+
+# Startup refuses a PostgreSQL table whose partitioning differs from the setting
+def test_check_partitioning_mismatch():
+    def engine(partitioned):
+        result = SimpleNamespace(scalar=lambda: partitioned)
+        conn = SimpleNamespace(execute=lambda statement: result)
+        return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), connect=lambda: nullcontext(conn))
+
+    check_partitioning(engine(False))
+    with pytest.raises(RuntimeError, match="is partitioned"):
+        check_partitioning(engine(True))
+
+
+# Detaching a month drops the cached keys, which may point at its rows
+def test_detach_partition_clears_id_cache():
+    statements = []
+    conn = SimpleNamespace(execute=lambda statement: statements.append(str(statement)))
+    connection = SimpleNamespace(execution_options=lambda **options: nullcontext(conn))
+    engine = SimpleNamespace(connect=lambda: connection)
+
+    remember_transaction_ids(["p1", "p2"])
+    detach_partition(date(2025, 8, 14), engine)
+    assert statements == ["ALTER TABLE transactions DETACH PARTITION transactions_y2025m08"]
+    assert get_transaction_id_cache_metrics()["size"] == 0
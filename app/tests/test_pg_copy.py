@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+import pandas as pd
+from sqlalchemy import insert
+from app.uploads import models
+from app.uploads.services import _cast_columns, _copy_transactions, _materialize_rows
+
+
+class FakeCursor:
+    """DBAPI cursor that records what _copy_transactions sends to PostgreSQL."""
+
+    def __init__(self, inserted_ids):
+        self.statements = []
+        self.staged = None
+        self.closed = False
+        self._inserted_ids = inserted_ids
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+    def copy_expert(self, sql, buffer):
+        self.statements.append(sql)
+        self.staged = buffer.read()
+
+    def fetchall(self):
+        return [(transaction_id,) for transaction_id in self._inserted_ids]
+
+    def close(self):
+        self.closed = True
+
+
+def _fake_session(cursor):
+    return SimpleNamespace(connection=lambda: SimpleNamespace(connection=SimpleNamespace(cursor=lambda: cursor)))
+
+
+def _frame():
+    return _cast_columns(pd.DataFrame({
+        "transaction_id": ["c1", "c2"],
+        "timestamp": ["2025-08-28 12:00:00", "2025-08-28 13:30:00"],
+        "customer_tier": ["", None],
+        "has_multiple_accounts": [1, None],
+        "transaction_amount": [1.5, None],
+    }))
+
+
+# The chunk is staged as CSV with COPY, then merged with ON CONFLICT DO NOTHING
+def test_copy_transactions_sql():
+    cursor = FakeCursor(["c1"])
+    inserted = _copy_transactions(_frame(), _fake_session(cursor))
+
+    assert inserted == ["c1"]
+    assert cursor.closed
+    create, copy, merge, truncate = cursor.statements
+    assert create.startswith("CREATE TEMP TABLE IF NOT EXISTS transactions_staging (LIKE transactions")
+    columns = "transaction_id, timestamp, customer_tier, has_multiple_accounts, transaction_amount"
+    assert copy == f"COPY transactions_staging ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    assert merge == (
+        f"INSERT INTO transactions ({columns}) SELECT {columns} FROM transactions_staging "
+        f"ON CONFLICT ({', '.join(models.TRANSACTION_CONFLICT_COLUMNS)}) DO NOTHING RETURNING transaction_id"
+    )
+    assert truncate == "TRUNCATE transactions_staging"
+
+    # Missing values are \N (NULL); an empty string stays an empty field ('')
+    assert cursor.staged.splitlines() == [
+        "c1,2025-08-28 12:00:00,,True,1.5",
+        "c2,2025-08-28 13:30:00,\\N,\\N,\\N",
+    ]
+
+
+# The executemany path keeps the same distinction between '' and NULL
+def test_executemany_keeps_empty_strings(db_session):
+    rows = _materialize_rows(_frame())
+    assert [row["customer_tier"] for row in rows] == ["", None]
+
+    db_session.execute(insert(models.Transaction), rows)
+    tiers = dict(db_session.query(models.Transaction.transaction_id, models.Transaction.customer_tier).all())
+    assert tiers == {"c1": "", "c2": None}
@@ -0,0 +1,217 @@
+import io
+import json
+import pytest
+import pandas as pd
+from app.transactions import services
+
+
+HEADER = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+
+
+def _upload(client, prefix: str, rows: int) -> str:
+    body = "\n".join(
+        f"{prefix}{i},2025-08-{10 + i:02d} 12:00:00,user{i % 2},30,Gold,Level1,0,1,{100.0 + i},USD,Purchase,Retail,m{i % 3},2,12,Monday,0,0,dev{i % 4},iOS,Mobile,0,1,192.168.0.1,0,0,0,0,5.0,0,0,0,0,{i % 2},0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+        for i in range(rows)
+    )
+    file = {"file": (f"{prefix}.csv", io.BytesIO((HEADER + body).encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    return response.json()["data"]["upload_id"]
+
+
+# Rows are tagged with the upload that inserted them
+def test_ingest_sets_upload_id(client, db_session):
+    from app.uploads import models
+    upload_id = _upload(client, "tag", 3)
+    assert {t.upload_id for t in db_session.query(models.Transaction).filter(models.Transaction.transaction_id.like("tag%"))} == {upload_id}
+
+
+def test_export_csv_streams_in_batches(client, db_session, monkeypatch):
+    monkeypatch.setattr(services, "EXPORT_BATCH_SIZE", 3)
+    _upload(client, "csv", 10)
+
+    response = client.get("/api/v1/transactions/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    frame = pd.read_csv(io.StringIO(response.text))
+    assert sorted(frame["transaction_id"]) == sorted(f"csv{i}" for i in range(10))
+    assert frame.loc[frame["transaction_id"] == "csv3", "timestamp"].iloc[0] == "2025-08-13 12:00:00"
+
+
+# An exported CSV uploads again cleanly; every row is already stored
+def test_export_csv_round_trips(client, db_session):
+    _upload(client, "rt", 4)
+
+    exported = client.get("/api/v1/transactions/export", params={"format": "csv"}).text
+    frame = pd.read_csv(io.StringIO(exported))
+    assert set(frame["is_proxy_used"]) == {1}
+    assert set(frame["transaction_day_of_week"]) == {"Monday"}
+
+    file = {"file": ("export.csv", io.BytesIO(exported.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["failed_rows"] == 0
+    assert data["duplicate_rows"] == 4
+
+
+def test_export_filters(client, db_session):
+    first = _upload(client, "fa", 10)
+    _upload(client, "fb", 4)
+
+    params = {
+        "format": "ndjson", "upload_id": first, "user_id": "user1", "label": 1,
+        "start": "2025-08-12T00:00:00", "end": "2025-08-18T00:00:00",
+    }
+    response = client.get("/api/v1/transactions/export", params=params)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["transaction_id"] for row in rows) == ["fa3", "fa5", "fa7"]
+    assert all(row["upload_id"] == first for row in rows)
+
+
+def test_export_parquet(client, db_session, monkeypatch):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    monkeypatch.setattr(services, "EXPORT_BATCH_SIZE", 4)
+    _upload(client, "pq", 10)
+
+    response = client.get("/api/v1/transactions/export", params={"format": "parquet"})
+    assert response.status_code == 200
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+    assert parquet.metadata.num_rows == 10
+    assert parquet.num_row_groups == 3
+    table = parquet.read()
+    assert str(table.schema.field("timestamp").type) == "timestamp[us]"
+    assert str(table.schema.field("is_proxy_used").type) == "bool"
+
+
+def test_export_empty(client, db_session):
+    response = client.get("/api/v1/transactions/export", params={"user_id": "nobody"})
+    assert response.status_code == 200
+    assert response.text.startswith("transaction_id,timestamp")
+
+
+def test_export_invalid_format(client):
+    assert client.get("/api/v1/transactions/export", params={"format": "xml"}).status_code == 422
+
+
+def test_list_transactions_keyset_pages(client, db_session):
+    _upload(client, "page", 10)
+
+    seen = []
+    params = {"user_id": "user0", "limit": 2}
+    while True:
+        response = client.get("/api/v1/transactions/", params=params)
+        assert response.status_code == 200
+        seen.extend(row["transaction_id"] for row in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    # user0 holds the even rows; newest timestamp first
+    assert seen == ["page8", "page6", "page4", "page2", "page0"]
+
+    response = client.get("/api/v1/transactions/", params={"device_id": "dev1", "sort": "timestamp"})
+    assert [row["transaction_id"] for row in response.json()] == ["page1", "page5", "page9"]
+    assert response.json()[0]["transaction_amount"] == 101.0
+
+
+def test_list_transactions_invalid_cursor(client):
+    response = client.get("/api/v1/transactions/", params={"cursor": "bm90LWEtY3Vyc29y"})
+    assert response.status_code == 400
+
+
+def test_query_latency_seeded_table(db_session):
+    """Filtered keyset pages on a seeded table are served by the composite indexes"""
+    import time
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert, text
+    from app.uploads import models
+
+    n_rows = 50000
+    base = datetime(2025, 1, 1)
+    records = [
+        {
+            "transaction_id": f"seed{i}",
+            "timestamp": base + timedelta(minutes=i),
+            "user_id": f"user{i % 500}",
+            "device_id": f"dev{i % 2000}",
+            "merchant_id": f"m{i % 50}",
+            "label": float(i % 20 == 0),
+            "transaction_amount": float(i % 1000),
+        }
+        for i in range(n_rows)
+    ]
+    for i in range(0, n_rows, 5000):
+        db_session.execute(insert(models.Transaction.__table__), records[i:i + 5000])
+
+    cases = {
+        "ix_transactions_user_id_timestamp": {"user_id": "user42"},
+        "ix_transactions_device_id_timestamp": {"device_id": "dev7"},
+        "ix_transactions_merchant_id_timestamp": {"merchant_id": "m3"},
+        "ix_transactions_label_timestamp": {"label": 1.0},
+        "ix_transactions_timestamp_transaction_id": {},
+    }
+    for index_name, kwargs in cases.items():
+        filters = services.transaction_filters(**kwargs)
+        rows, cursor = services.list_transactions(db_session, filters, limit=50)
+
+        # The page is read in index order, without a sort step
+        stmt = services.transaction_page_query(filters, cursor, limit=50)
+        compiled = stmt.compile(db_session.get_bind(), compile_kwargs={"literal_binds": True})
+        plan = " ".join(str(row[-1]) for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+        assert index_name in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+        timings = []
+        for _ in range(20):
+            start_time = time.perf_counter()
+            services.list_transactions(db_session, filters, cursor=cursor, limit=50)
+            timings.append(time.perf_counter() - start_time)
+        median_ms = sorted(timings)[len(timings) // 2] * 1000
+        print(f"{index_name}: {median_ms:.2f} ms per page")
+        assert median_ms < 50, f"{index_name} page took {median_ms:.2f} ms"
+
+
+def test_rollups_maintained_at_ingest(client, db_session):
+    from app.transactions import models as transaction_models
+    _upload(client, "roll", 10)
+    # Re-sent rows are duplicates and must not be counted twice
+    body = "\n".join([
+        "roll0,2025-08-10 12:00:00,user0,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,m0,2,12,Monday,0,0,dev0,iOS,Mobile,0,1,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0",
+        "roll10,2025-09-30 08:00:00,user0,30,Gold,Level1,0,1,50.0,USD,Purchase,Retail,m0,2,8,Tuesday,0,0,dev9,iOS,Mobile,0,1,192.168.0.1,0,0,0,0,5.0,0,0,0,0,1,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0",
+    ])
+    file = {"file": ("more.csv", io.BytesIO((HEADER + body).encode("utf-8")), "text/csv")}
+    assert client.post("/api/v1/uploads/csv/", files=file).status_code == 201
+
+    # user0 holds rows 0, 2, 4, 6, 8 (labels 0) plus roll10 (label 1)
+    user = db_session.get(transaction_models.UserRollup, "user0")
+    assert user.transaction_count == 6
+    assert user.amount_sum == sum(100.0 + i for i in (0, 2, 4, 6, 8)) + 50.0
+    assert user.label_sum == 1.0
+    assert user.first_seen.day == 10 and user.last_seen.month == 9
+
+    response = client.get("/api/v1/transactions/rollups/users/user0")
+    assert response.status_code == 200
+    assert response.json()["fraud_rate"] == pytest.approx(1 / 6)
+
+    response = client.get("/api/v1/transactions/rollups/merchants/", params={"sort": "amount_sum", "limit": 2})
+    assert [row["key"] for row in response.json()] == ["m0", "m2"]
+    assert client.get("/api/v1/transactions/rollups/devices/dev404").status_code == 404
+    assert client.get("/api/v1/transactions/rollups/cards/x").status_code == 404
+
+
+# Each allowed sort of the rollup listing reads its own index, without a sort step
+def test_rollup_sorts_use_indexes(db_session):
+    from sqlalchemy import select, text
+    from app.transactions.models import ROLLUP_SORTS
+    from app.transactions.rollups import ROLLUPS
+
+    for key, model in ROLLUPS.items():
+        for sort in ROLLUP_SORTS:
+            stmt = select(model).order_by(getattr(model, sort).desc(), getattr(model, key)).limit(100)
+            compiled = stmt.compile(db_session.get_bind(), compile_kwargs={"literal_binds": True})
+            plan = " ".join(str(row[-1]) for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+            assert f"ix_{model.__tablename__}_{sort}" in plan, plan
+            assert "TEMP B-TREE" not in plan, plan
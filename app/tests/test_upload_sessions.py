@@ -0,0 +1,84 @@
+import os
+import pytest
+from app.uploads import models, staging, jobs
+
+
+HEADER = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+
+
+def _csv_bytes(rows: int) -> bytes:
+    body = "\n".join(
+        f"part{i},2025-08-28 12:00:00,user{i},30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev{i},iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+        for i in range(rows)
+    )
+    return (HEADER + body).encode("utf-8")
+
+
+@pytest.fixture(autouse=True)
+def staging_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(staging, "UPLOAD_STAGING_DIR", str(tmp_path / "staging"))
+    monkeypatch.setattr(jobs, "UPLOAD_TMP_DIR", str(tmp_path))
+    return tmp_path
+
+
+# Parts sent out of order are joined in part-number order
+def test_chunked_upload_session(client, db_session, staging_dir):
+    content = _csv_bytes(30)
+    # Split mid-line so parts are not row-aligned
+    parts = [content[:1000], content[1000:2500], content[2500:]]
+
+    response = client.post("/api/v1/uploads/sessions/", json={"filename": "big.csv"})
+    assert response.status_code == 201
+    session_id = response.json()["data"]["session_id"]
+
+    for number in (3, 1, 2):
+        response = client.put(f"/api/v1/uploads/sessions/{session_id}/parts/{number}", content=parts[number - 1])
+        assert response.status_code == 200
+        assert response.json()["data"]["size"] == len(parts[number - 1])
+
+    response = client.get(f"/api/v1/uploads/sessions/{session_id}/")
+    assert [part["part_number"] for part in response.json()["data"]["parts"]] == [1, 2, 3]
+
+    response = client.post(f"/api/v1/uploads/sessions/{session_id}/complete")
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["successful_rows"] == 30
+    assert data["filename"] == "big.csv"
+    assert db_session.query(models.Transaction).filter(models.Transaction.transaction_id.like("part%")).count() == 30
+
+    # The session and the assembled file are cleaned up
+    assert client.get(f"/api/v1/uploads/sessions/{session_id}/").status_code == 404
+    assert [name for name in os.listdir(staging_dir) if name.endswith(".csv")] == []
+
+
+def test_upload_session_missing_part(client, db_session):
+    session_id = client.post("/api/v1/uploads/sessions/", json={"filename": "gap.csv"}).json()["data"]["session_id"]
+    client.put(f"/api/v1/uploads/sessions/{session_id}/parts/1", content=b"a")
+    client.put(f"/api/v1/uploads/sessions/{session_id}/parts/3", content=b"c")
+
+    response = client.post(f"/api/v1/uploads/sessions/{session_id}/complete")
+    assert response.status_code == 400
+    assert "[2]" in response.json()["detail"]
+    assert db_session.query(models.UploadHistory).count() == 0
+
+
+def test_upload_session_not_found(client):
+    assert client.put("/api/v1/uploads/sessions/../parts/1", content=b"x").status_code == 404
+    assert client.put("/api/v1/uploads/sessions/not-a-session/parts/1", content=b"x").status_code == 404
+    response = client.post("/api/v1/uploads/sessions/00000000-0000-0000-0000-000000000000/complete")
+    assert response.status_code == 404
+
+
+# Aborted and expired sessions are deleted with their parts
+def test_upload_session_abort_and_sweep(client, staging_dir):
+    aborted = client.post("/api/v1/uploads/sessions/", json={"filename": "abort.csv"}).json()["data"]["session_id"]
+    client.put(f"/api/v1/uploads/sessions/{aborted}/parts/1", content=b"a")
+    assert client.delete(f"/api/v1/uploads/sessions/{aborted}/").status_code == 200
+    assert client.get(f"/api/v1/uploads/sessions/{aborted}/").status_code == 404
+    assert client.delete(f"/api/v1/uploads/sessions/{aborted}/").status_code == 404
+
+    expired = client.post("/api/v1/uploads/sessions/", json={"filename": "old.csv"}).json()["data"]["session_id"]
+    client.put(f"/api/v1/uploads/sessions/{expired}/parts/1", content=b"a")
+    assert staging.sweep_sessions() == 0
+    assert staging.sweep_sessions(ttl_seconds=-1) == 1
+    assert not os.path.exists(staging_dir / "staging" / expired)
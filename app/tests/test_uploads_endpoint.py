@@ -1,5 +1,6 @@
 import io
 import pytest
+import pandas as pd
 
 
 # Successful Upload
@@ -41,3 +42,511 @@ def test_malformed_csv(client):
     file = {"file": ("malformed.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")}
     response = client.post("/api/v1/uploads/csv/", files=file)
     assert response.status_code in [400, 500] 
+
+# Streaming upload across several chunks
+def test_chunked_upload(client, db_session, monkeypatch):
+    from app.uploads import models, readers
+    monkeypatch.setattr(readers, "CSV_CHUNK_SIZE", 10)
+
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    rows = [
+        f"chunk{i},2025-08-28 12:00:00,user{i},30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev{i},iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+        for i in range(25)
+    ]
+    csv_content = header + "\n".join(rows)
+
+    file = {"file": ("chunked.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["total_rows"] == 25
+    assert data["successful_rows"] == 25
+    assert db_session.query(models.Transaction).count() == 25
+
+# Background upload with status polling
+def test_background_upload(client, db_session):
+    from app.uploads import models, jobs
+
+    csv_content = """transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h
+bg1,2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0
+bg2,2025-08-28 12:00:00,102,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0
+"""
+
+    file = {"file": ("background.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/?background=true", files=file)
+    assert response.status_code == 202
+    upload_id = response.json()["data"]["upload_id"]
+
+    job = jobs.get_job(upload_id)
+    if job is not None:
+        job.result(timeout=10)
+
+    status_response = client.get(f"/api/v1/uploads/{upload_id}/")
+    assert status_response.status_code == 200
+    data = status_response.json()
+    assert data["status"] == "success"
+    assert data["rows_processed"] == 2
+    assert data["progress"]["rows_parsed"] == 2
+    assert data["progress"]["inserted"] == 2
+    assert db_session.query(models.Transaction).count() == 2
+
+# Unknown upload status
+def test_upload_status_not_found(client):
+    response = client.get("/api/v1/uploads/does-not-exist/")
+    assert response.status_code == 404
+
+# Keyset pagination of upload history
+def test_history_cursor_pagination(client, db_session):
+    from datetime import datetime, timedelta
+    from app.uploads import models
+
+    base = datetime(2025, 8, 28, 12, 0, 0)
+    for i in range(5):
+        # Two uploads share a timestamp to exercise the id tie-breaker
+        db_session.add(models.UploadHistory(
+            filename=f"history{i}.csv",
+            uploaded_at=base + timedelta(minutes=i // 2),
+            rows_processed=i,
+            status="success",
+        ))
+    db_session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/api/v1/uploads/history/?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(item["filename"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [f"history{i}.csv" for i in (4, 3, 2, 1, 0)]
+
+    # skip/limit keeps working
+    response = client.get("/api/v1/uploads/history/?skip=1&limit=2")
+    assert [item["filename"] for item in response.json()] == ["history3.csv", "history2.csv"]
+
+    # Garbage cursors are rejected
+    response = client.get("/api/v1/uploads/history/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+# History summary leaves out details
+def test_history_summary(client, db_session):
+    from app.uploads import models
+
+    db_session.add(models.UploadHistory(
+        filename="summary.csv",
+        rows_processed=3,
+        status="partial",
+        details={"errors": [{"row": 1, "error": "bad"}]},
+    ))
+    db_session.commit()
+
+    response = client.get("/api/v1/uploads/history/summary/")
+    assert response.status_code == 200
+    item = response.json()[0]
+    assert item["filename"] == "summary.csv"
+    assert item["rows_processed"] == 3
+    assert "details" not in item
+
+    # Details load on demand
+    response = client.get(f"/api/v1/uploads/{item['upload_id']}/")
+    assert response.json()["details"]["errors"][0]["error"] == "bad"
+
+# Declared dtypes keep IDs as text
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_ids_parsed_as_text(client, db_session, monkeypatch, engine):
+    from app.uploads import models, readers
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(readers, "CSV_PARSER_ENGINE", engine)
+
+    csv_content = """transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h
+007,2025-08-28 12:00:00,0101,30,Gold,Level1,1,1,100.0,USD,Purchase,Retail,501,2,12,Tuesday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0
+"""
+    file = {"file": ("dtypes.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    assert response.json()["data"]["successful_rows"] == 1
+
+    transaction = db_session.query(models.Transaction).filter_by(transaction_id="007").first()
+    assert transaction is not None
+    assert transaction.user_id == "0101"
+    assert transaction.customer_tier == "Gold"
+    assert transaction.transaction_day_of_week == 1
+    assert transaction.has_multiple_accounts is True
+
+# A value that is not a number fails its row, not the upload
+def test_dtype_mismatch_rejected(client, db_session):
+    from app.uploads import models
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    row = "{},2025-08-28 12:00:00,101,{},Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+    content = header + "\n".join([row.format("dt1", "30"), row.format("dt2", "thirty"), row.format("dt3", "31")])
+    file = {"file": ("bad_dtype.csv", io.BytesIO(content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["successful_rows"] == 2
+    assert data["failed_rows"] == 1
+
+    record = db_session.query(models.UploadHistory).filter_by(upload_id=data["upload_id"]).first()
+    assert record.status == "partial"
+    assert record.details["errors"][0]["transaction_id"] == "dt2"
+    assert "account_age_days not a number" in record.details["errors"][0]["error"]
+
+# Only the chunk holding the bad token is re-read as text; the rows around it still load
+def test_dtype_mismatch_rereads_one_chunk(client, db_session, monkeypatch):
+    from app.uploads import models, readers
+    monkeypatch.setattr(readers, "CSV_CHUNK_SIZE", 1)
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    row = "{},2025-08-28 12:00:00,101,{},Gold,Level1,{},1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+    content = header + "\n".join([
+        row.format("rc1", "30", "0"), row.format("rc2", "31", "yes"), row.format("rc3", "32", "1"),
+    ])
+    file = {"file": ("rechunk.csv", io.BytesIO(content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["successful_rows"] == 2
+    assert data["failed_rows"] == 1
+
+    record = db_session.query(models.UploadHistory).filter_by(upload_id=data["upload_id"]).first()
+    assert record.details["errors"][0]["transaction_id"] == "rc2"
+    assert "has_multiple_accounts not a number" in record.details["errors"][0]["error"]
+    ages = dict(db_session.query(models.Transaction.transaction_id, models.Transaction.account_age_days).all())
+    assert ages == {"rc1": 30, "rc3": 32}
+
+# Header is rejected before the body is parsed
+def test_misspelled_header_rejected_early(client, db_session, monkeypatch):
+    from app.uploads import models, readers
+    header = "transaction_id,timestmap,user_id\n"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("body should not be parsed")
+
+    monkeypatch.setattr(readers.pd, "read_csv", fail)
+    file = {"file": ("typo.csv", io.BytesIO((header + "1,2025-08-28 12:00:00,101").encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 400
+    assert "timestamp" in response.json()["message"]
+    assert db_session.query(models.UploadHistory).count() == 0
+
+# Sniffed encoding and delimiter are used for the body
+@pytest.mark.parametrize("delimiter,encoding", [(";", "utf-8"), ("\t", "latin-1"), (",", "utf-8-sig")])
+def test_sniffed_csv_dialect(client, db_session, delimiter, encoding):
+    from app.uploads import models
+    columns = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h"
+    row = "sniff1,2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,São Paulo,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+    csv_content = "\n".join([columns, row]).replace(",", delimiter)
+
+    file = {"file": ("dialect.csv", io.BytesIO(csv_content.encode(encoding)), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    assert response.json()["data"]["successful_rows"] == 1
+
+    transaction = db_session.query(models.Transaction).filter_by(transaction_id="sniff1").first()
+    assert transaction.location_city == "São Paulo"
+
+# Rows with impossible values are split off, the rest are inserted
+def test_invalid_rows_reported(client, db_session):
+    from app.uploads import models
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    rows = [
+        "ok1,2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0",
+        "bad1,28/08/2025,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Moonday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0",
+        "bad2,2025-08-28 12:00:00,101,30,Gold,Level1,2,1,-5.0,USD,Purchase,Retail,501,2,24,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0",
+        "ok2,2025-08-28 13:00:00,102,30,Gold,Level1,1,1,100.0,USD,Purchase,Retail,501,2,13,Friday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0",
+    ]
+    file = {"file": ("invalid.csv", io.BytesIO((header + "\n".join(rows)).encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["successful_rows"] == 2
+    assert data["failed_rows"] == 2
+
+    record = db_session.query(models.UploadHistory).filter_by(upload_id=data["upload_id"]).first()
+    assert record.status == "partial"
+    errors = {error["transaction_id"]: error for error in record.details["errors"]}
+    assert errors["bad1"]["row"] == 2
+    assert "unparseable timestamp" in errors["bad1"]["error"]
+    assert "unknown transaction_day_of_week" in errors["bad1"]["error"]
+    assert errors["bad2"]["row"] == 3
+    assert "has_multiple_accounts not 0/1" in errors["bad2"]["error"]
+    assert "transaction_hour outside 0-23" in errors["bad2"]["error"]
+    assert "negative transaction_amount" in errors["bad2"]["error"]
+    assert record.details["invalid_rows"]["unparseable timestamp"] == 1
+    assert db_session.query(models.Transaction).filter(models.Transaction.transaction_id.in_(["bad1", "bad2"])).count() == 0
+
+# Rows without a transaction_id are rejected instead of being stored or ignored
+def test_missing_transaction_id_rejected(client, db_session):
+    from app.uploads import models
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    row = "{},2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+    content = header + "\n".join([row.format("keep1"), row.format(""), row.format(" ")])
+    file = {"file": ("no_id.csv", io.BytesIO(content.encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["successful_rows"] == 1
+    assert data["failed_rows"] == 2
+
+    record = db_session.query(models.UploadHistory).filter_by(upload_id=data["upload_id"]).first()
+    assert record.details["invalid_rows"]["missing transaction_id"] == 2
+    assert db_session.query(models.Transaction).count() == 1
+
+# Every numeric column reports text values as not a number, once
+def test_text_in_numeric_columns_flagged():
+    from app.uploads.validators import validate_transaction_rows, EXPECTED_COLUMNS, NUMERIC_COLUMNS
+    df = pd.DataFrame({column: [None] * 3 for column in EXPECTED_COLUMNS})
+    df["transaction_id"] = ["n1", "n2", "n3"]
+    df["timestamp"] = "2025-08-28 12:00:00"
+    for name in NUMERIC_COLUMNS:
+        df[name] = ["1", "abc", None]
+
+    parsed, failures = validate_transaction_rows(df)
+    for name in NUMERIC_COLUMNS:
+        assert failures[f"{name} not a number"].tolist() == [False, True, False]
+        assert parsed[name].iloc[0] == 1
+    assert not failures.loc[1, [c for c in failures.columns if not c.endswith("not a number")]].any()
+    assert not failures.loc[[0, 2]].any(axis=None)
+
+# IPs are only checked where they are stored as INET (PostgreSQL)
+def test_invalid_ip_address_rejected_for_inet():
+    from app.uploads.validators import validate_transaction_rows, EXPECTED_COLUMNS
+    df = pd.DataFrame({column: [None] * 4 for column in EXPECTED_COLUMNS})
+    df["timestamp"] = "2025-08-28 12:00:00"
+    df["ip_address"] = ["192.168.0.1", "2001:db8::1", "192.168.0.300", None]
+
+    _, failures = validate_transaction_rows(df, check_ip=True)
+    assert failures["invalid ip_address"].tolist() == [False, False, True, False]
+
+    _, failures = validate_transaction_rows(df)
+    assert "invalid ip_address" not in failures.columns
+
+# Enum columns (PostgreSQL) only accept the labels their type already has
+def test_unknown_enum_label_rejected():
+    from app.uploads.validators import validate_transaction_rows, EXPECTED_COLUMNS
+    df = pd.DataFrame({column: [None] * 3 for column in EXPECTED_COLUMNS})
+    df["timestamp"] = "2025-08-28 12:00:00"
+    df["customer_tier"] = pd.Series(["Gold", "G0ld", None], dtype="category")
+
+    _, failures = validate_transaction_rows(df, enum_labels={"customer_tier": {"Gold", "Silver"}})
+    assert failures["unknown customer_tier"].tolist() == [False, True, False]
+
+    _, failures = validate_transaction_rows(df)
+    assert "unknown customer_tier" not in failures.columns
+
+# A row the database rejects is isolated; the rest of its batch is inserted
+def test_failed_batch_bisected(client, db_session):
+    from sqlalchemy import text
+    from app.uploads import models
+    db_session.execute(text(
+        "CREATE TEMP TRIGGER reject_poison BEFORE INSERT ON transactions "
+        "WHEN NEW.transaction_id = 'poison' BEGIN SELECT RAISE(ABORT, 'poison row'); END"
+    ))
+
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    ids = [f"bisect{i}" for i in range(50)]
+    ids[37] = "poison"
+    rows = [
+        f"{transaction_id},2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+        for transaction_id in ids
+    ]
+    file = {"file": ("bisect.csv", io.BytesIO((header + "\n".join(rows)).encode("utf-8")), "text/csv")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["successful_rows"] == 49
+    assert data["failed_rows"] == 1
+
+    record = db_session.query(models.UploadHistory).filter_by(upload_id=data["upload_id"]).first()
+    assert record.details["errors"] == [
+        {"row": 38, "error": record.details["errors"][0]["error"], "transaction_id": "poison"}
+    ]
+    assert "poison row" in record.details["errors"][0]["error"]
+    assert db_session.query(models.Transaction).filter(models.Transaction.transaction_id.like("bisect%")).count() == 49
+
+# Identical content returns the earlier upload instead of a new one
+def test_resubmitted_content_returns_existing_upload(client, db_session):
+    from app.uploads import models
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    row = "same1,2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+    content = (header + row).encode("utf-8")
+
+    first = client.post("/api/v1/uploads/csv/", files={"file": ("a.csv", io.BytesIO(content), "text/csv")})
+    second = client.post("/api/v1/uploads/csv/", files={"file": ("b.csv", io.BytesIO(content), "text/csv")})
+    assert second.status_code == 201
+    assert second.json()["message"] == "File already processed"
+    assert second.json()["data"] == first.json()["data"]
+    assert db_session.query(models.UploadHistory).count() == 1
+
+# A failed upload of the same content resumes after its checkpoint
+def test_failed_upload_resumes_from_checkpoint(client, db_session):
+    import hashlib
+    from app.uploads import models
+    from app.uploads.services import new_summary, _summary_details
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    rows = [
+        f"resume{i},2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+        for i in range(25)
+    ]
+    content = (header + "\n".join(rows)).encode("utf-8")
+
+    # The first 10 rows were committed before the upload failed
+    summary = new_summary()
+    summary.update(total_rows=10, successful_rows=10)
+    details = _summary_details(summary)
+    details["checkpoint"] = {"rows": 10}
+    failed = models.UploadHistory(
+        filename="resume.csv", rows_processed=10, status="failed",
+        details=details, content_sha256=hashlib.sha256(content).hexdigest(),
+    )
+    db_session.add(failed)
+    db_session.commit()
+
+    response = client.post("/api/v1/uploads/csv/", files={"file": ("resume.csv", io.BytesIO(content), "text/csv")})
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["upload_id"] == failed.upload_id
+    assert data["total_rows"] == 25
+    assert data["successful_rows"] == 25
+
+    # Only the rows after the checkpoint were read again
+    assert db_session.query(models.Transaction).filter(models.Transaction.transaction_id.like("resume%")).count() == 15
+    db_session.refresh(failed)
+    assert failed.status == "success"
+    assert db_session.query(models.UploadHistory).count() == 1
+
+# A "processing" upload is only resumed once it stopped checkpointing
+def test_abandoned_processing_upload_resumes(client, db_session):
+    import hashlib
+    from datetime import datetime, timedelta
+    from app.uploads import models
+    from app.uploads.services import new_summary, _summary_details, UPLOAD_STALE_SECONDS
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    row = "orphan1,2025-08-28 12:00:00,101,30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev123,iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+    content = (header + row).encode("utf-8")
+
+    processing = models.UploadHistory(
+        filename="orphan.csv", rows_processed=0, status="processing",
+        details=_summary_details(new_summary()), content_sha256=hashlib.sha256(content).hexdigest(),
+    )
+    db_session.add(processing)
+    db_session.commit()
+
+    # Still checkpointing: another worker owns it
+    response = client.post("/api/v1/uploads/csv/", files={"file": ("orphan.csv", io.BytesIO(content), "text/csv")})
+    assert response.status_code == 202
+
+    # Silent for longer than UPLOAD_STALE_SECONDS: resumed here
+    stale = datetime.utcnow() - timedelta(seconds=UPLOAD_STALE_SECONDS + 60)
+    processing.details = {**processing.details, "heartbeat": stale.isoformat()}
+    db_session.commit()
+    response = client.post("/api/v1/uploads/csv/", files={"file": ("orphan.csv", io.BytesIO(content), "text/csv")})
+    assert response.status_code == 201
+    assert response.json()["data"]["upload_id"] == processing.upload_id
+    assert response.json()["data"]["successful_rows"] == 1
+    db_session.refresh(processing)
+    assert processing.status == "success"
+
+# Compressed uploads are decompressed while parsing
+@pytest.mark.parametrize("suffix", [".csv.gz", ".csv.zst"])
+def test_compressed_upload(client, db_session, suffix):
+    import gzip
+    from app.uploads import models
+    header = "transaction_id,timestamp,user_id,account_age_days,customer_tier,kyc_level,has_multiple_accounts,linked_card_count,transaction_amount,transaction_currency,transaction_type,merchant_category,merchant_id,merchant_risk_score,transaction_hour,transaction_day_of_week,is_weekend_transaction,is_nighttime_transaction,device_id,device_os,device_type,is_vpn_used,is_proxy_used,ip_address,has_multiple_devices,is_blacklisted_card,is_blacklisted_device,is_high_risk_country,distance_from_last_transaction,has_chargeback_history,previous_fraudulent_activity,account_fraud_reported,is_high_risk_behavior,label,ip_risk_score,location_country,location_city,is_new_device,is_new_location,num_failed_attempts_24h,prev_avg_txn_amount,txn_amount_deviation,daily_avg_spend,total_spend_last_7d,transaction_recency,txn_velocity_1h,txn_velocity_24h,transaction_success_rate_24h\n"
+    rows = [
+        f"zip{i},2025-08-28 12:00:00,user{i},30,Gold,Level1,0,1,100.0,USD,Purchase,Retail,501,2,12,Monday,0,0,dev{i},iOS,Mobile,0,0,192.168.0.1,0,0,0,0,5.0,0,0,0,0,0,0,USA,NYC,0,0,0,0.0,0.0,0.0,0.0,0.0,0.0,0.0,0.0"
+        for i in range(20)
+    ]
+    content = (header + "\n".join(rows)).encode("utf-8")
+    if suffix == ".csv.gz":
+        payload = gzip.compress(content)
+    else:
+        zstandard = pytest.importorskip("zstandard")
+        payload = zstandard.ZstdCompressor().compress(content)
+
+    file = {"file": ("export" + suffix, io.BytesIO(payload), "application/octet-stream")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    assert response.json()["data"]["successful_rows"] == 20
+    assert db_session.query(models.Transaction).filter(models.Transaction.transaction_id.like("zip%")).count() == 20
+
+# A corrupt archive is reported as a malformed upload
+def test_corrupt_gzip_rejected(client):
+    file = {"file": ("broken.csv.gz", io.BytesIO(b"not gzip at all"), "application/gzip")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 400
+    assert "Malformed CSV" in response.json()["message"]
+
+def _typed_transactions(n_rows: int, prefix: str) -> pd.DataFrame:
+    """Transactions typed like models.Transaction, as an upstream pipeline writes them"""
+    from sqlalchemy import Boolean, Integer, Float, DateTime
+    from app.uploads import models
+    columns = {}
+    for column in models.Transaction.__table__.columns:
+        if isinstance(column.type, Boolean):
+            columns[column.name] = [i % 2 == 0 for i in range(n_rows)]
+        elif isinstance(column.type, Integer):
+            columns[column.name] = [i % 7 for i in range(n_rows)]
+        elif isinstance(column.type, Float):
+            columns[column.name] = [float(i) for i in range(n_rows)]
+        elif isinstance(column.type, DateTime):
+            columns[column.name] = pd.date_range("2025-08-28", periods=n_rows, freq="min")
+        else:
+            columns[column.name] = [f"{column.name}{i}" for i in range(n_rows)]
+    columns["transaction_id"] = [f"{prefix}{i}" for i in range(n_rows)]
+    return pd.DataFrame(columns)
+
+# Parquet and Arrow IPC are read as typed columns
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_columnar_upload(client, db_session, suffix):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    from app.uploads import models
+    table = pa.Table.from_pandas(_typed_transactions(30, "col"), preserve_index=False)
+
+    buffer = io.BytesIO()
+    if suffix == ".parquet":
+        pq.write_table(table, buffer, row_group_size=10)
+    else:
+        with pa.ipc.new_file(buffer, table.schema) as writer:
+            writer.write_table(table, max_chunksize=10)
+
+    file = {"file": ("features" + suffix, io.BytesIO(buffer.getvalue()), "application/octet-stream")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 201
+    assert response.json()["data"]["successful_rows"] == 30
+
+    transaction = db_session.query(models.Transaction).filter_by(transaction_id="col8").first()
+    assert transaction.transaction_day_of_week == 1
+    assert transaction.is_vpn_used is True
+    assert transaction.transaction_amount == 8.0
+    assert transaction.timestamp.minute == 8
+
+# Columns are checked against the Parquet schema
+def test_parquet_missing_columns(client, db_session):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    buffer = io.BytesIO()
+    pq.write_table(pa.table({"transaction_id": ["1"], "user_id": ["101"]}), buffer)
+
+    file = {"file": ("partial.parquet", io.BytesIO(buffer.getvalue()), "application/octet-stream")}
+    response = client.post("/api/v1/uploads/csv/", files=file)
+    assert response.status_code == 400
+    assert "Missing columns" in response.json()["message"]
+
+# A resumed Parquet upload skips whole row groups
+def test_parquet_skip_rows():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    from app.uploads.readers import read_upload_chunks
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(_typed_transactions(30, "skip"), preserve_index=False), buffer, row_group_size=10)
+
+    chunks = list(read_upload_chunks(buffer, file_format="parquet", skip_rows=15))
+    frame = pd.concat(chunks)
+    assert list(frame.index) == list(range(15, 30))
+    assert frame["transaction_id"].iloc[0] == "skip15"
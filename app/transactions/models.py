@@ -0,0 +1,49 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, Index, text
+from app.core.database import Base
+
+
+# Totals GET /api/v1/transactions/rollups/{kind}/ can sort by, largest first
+ROLLUP_SORTS = ["transaction_count", "amount_sum", "label_sum"]
+
+
+def _sort_indexes(table: str, key: str) -> tuple:
+    """
+    One (sort DESC, key) index per ROLLUP_SORTS column, so a top-N listing
+    reads the first rows of an index instead of sorting the table.
+    """
+    return tuple(Index(f"ix_{table}_{sort}", text(f"{sort} DESC"), key) for sort in ROLLUP_SORTS)
+
+
+class RollupMixin:
+    """
+    Running totals over inserted transactions, kept up to date at ingest.
+    """
+    transaction_count = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(Float, nullable=False, default=0.0)  # sum of transaction_amount
+    label_sum = Column(Float, nullable=False, default=0.0)  # fraud-labelled transactions
+    first_seen = Column(DateTime)
+    last_seen = Column(DateTime)
+
+
+class UserRollup(RollupMixin, Base):
+    __tablename__ = "user_rollups"
+
+    user_id = Column(String, primary_key=True)
+
+    __table_args__ = _sort_indexes(__tablename__, "user_id")
+
+
+class DeviceRollup(RollupMixin, Base):
+    __tablename__ = "device_rollups"
+
+    device_id = Column(String, primary_key=True)
+
+    __table_args__ = _sort_indexes(__tablename__, "device_id")
+
+
+class MerchantRollup(RollupMixin, Base):
+    __tablename__ = "merchant_rollups"
+
+    merchant_id = Column(String, primary_key=True)
+
+    __table_args__ = _sort_indexes(__tablename__, "merchant_id")
@@ -0,0 +1,88 @@
+import logging
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.transactions import models
+
+
+logger = logging.getLogger(__name__)
+
+
+# Grouping column -> rollup table
+ROLLUPS = {
+    "user_id": models.UserRollup,
+    "device_id": models.DeviceRollup,
+    "merchant_id": models.MerchantRollup,
+}
+
+_ROLLUP_INPUTS = ["transaction_id", "transaction_amount", "label", "timestamp"]
+
+
+def update_rollups(frame: pd.DataFrame, inserted_ids: list[str], db: Session):
+    """
+    Folds the newly inserted rows of a cast chunk into every rollup table
+    with one grouped upsert per table. Runs in the chunk's transaction, so
+    rollups commit together with the rows they count.
+    """
+    if not inserted_ids:
+        return
+
+    rows = frame[frame["transaction_id"].isin(inserted_ids)]
+    rows = rows.reindex(columns=_ROLLUP_INPUTS + list(ROLLUPS))
+
+    for key, model in ROLLUPS.items():
+        grouped = rows.dropna(subset=[key]).groupby(key, sort=True).agg(
+            transaction_count=("transaction_id", "size"),
+            amount_sum=("transaction_amount", "sum"),
+            label_sum=("label", "sum"),
+            first_seen=("timestamp", "min"),
+            last_seen=("timestamp", "max"),
+        )
+        if grouped.empty:
+            continue
+        # Sorted keys make concurrent writers lock rows in the same order
+        db.execute(_upsert(model, key, db), _rollup_records(grouped.reset_index()))
+
+
+def _rollup_records(grouped: pd.DataFrame) -> list[dict]:
+    records = grouped.astype(object).where(grouped.notna(), None).to_dict("records")
+    for record in records:
+        for column in ("first_seen", "last_seen"):
+            if record[column] is not None:
+                record[column] = record[column].to_pydatetime()
+        record["transaction_count"] = int(record["transaction_count"])
+    return records
+
+
+def _upsert(model, key: str, db: Session):
+    """
+    INSERT ... ON CONFLICT (key) DO UPDATE adding the chunk's totals to the
+    stored ones.
+    """
+    table = model.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = postgresql.insert(table)
+        least, greatest = func.least, func.greatest
+    else:
+        stmt = sqlite.insert(table)
+        least, greatest = func.min, func.max
+
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={
+            "transaction_count": table.c.transaction_count + excluded.transaction_count,
+            "amount_sum": table.c.amount_sum + excluded.amount_sum,
+            "label_sum": table.c.label_sum + excluded.label_sum,
+            # COALESCE both ways so a NULL on either side never wins
+            "first_seen": least(
+                func.coalesce(table.c.first_seen, excluded.first_seen),
+                func.coalesce(excluded.first_seen, table.c.first_seen),
+            ),
+            "last_seen": greatest(
+                func.coalesce(table.c.last_seen, excluded.last_seen),
+                func.coalesce(excluded.last_seen, table.c.last_seen),
+            ),
+        },
+    )
@@ -0,0 +1,151 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+from app.core.database import get_db
+from app.transactions import services
+from app.transactions.models import ROLLUP_SORTS
+from app.transactions.rollups import ROLLUPS
+from app.transactions.schemas import TransactionResponse, RollupResponse
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    tags=['Transactions'],
+    prefix='/api/v1/transactions'
+)
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", services.export_csv),
+    "ndjson": ("application/x-ndjson", services.export_ndjson),
+    "parquet": ("application/vnd.apache.parquet", services.export_parquet),
+}
+
+
+@router.get("/", response_model=list[TransactionResponse])
+def list_transactions(
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    merchant_id: Optional[str] = None,
+    label: Optional[float] = None,
+    upload_id: Optional[str] = None,
+    sort: str = Query("-timestamp", pattern="^-?timestamp$"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Query transactions, newest first (sort=timestamp for oldest first).
+    start (inclusive) and end (exclusive) bound timestamp.
+    When a page is full, the X-Next-Cursor response header holds the cursor
+    for the next page.
+    """
+    filters = services.transaction_filters(
+        start, end, user_id, label, upload_id, device_id=device_id, merchant_id=merchant_id
+    )
+    try:
+        rows, next_cursor = services.list_transactions(
+            db, filters, cursor=cursor, limit=limit, descending=sort.startswith("-")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@router.get("/export")
+def export_transactions(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[str] = None,
+    label: Optional[float] = None,
+    upload_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    merchant_id: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream matching transactions as CSV, NDJSON or Parquet.
+    start (inclusive) and end (exclusive) bound timestamp. Rows are read
+    through a server-side cursor in batches and written out as they arrive,
+    so memory stays flat however many rows are exported.
+    """
+    if export_format == "parquet" and services.pq is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export needs the pyarrow package."
+        )
+
+    media_type, writer = EXPORT_FORMATS[export_format]
+    filters = services.transaction_filters(
+        start, end, user_id, label, upload_id, device_id=device_id, merchant_id=merchant_id
+    )
+    logger.info(f"Exporting transactions as {export_format}")
+
+    return StreamingResponse(
+        writer(services.stream_transaction_batches(db, filters)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{export_format}"'},
+    )
+
+
+# Path segment -> grouping column
+ROLLUP_KINDS = {"users": "user_id", "devices": "device_id", "merchants": "merchant_id"}
+
+
+@router.get("/rollups/{kind}/", response_model=list[RollupResponse])
+def list_rollups(
+    kind: str,
+    sort: str = Query("transaction_count", pattern=f"^({'|'.join(ROLLUP_SORTS)})$"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Top users, devices or merchants by a precomputed total, largest first,
+    read in order from the (sort DESC, key) index on the rollup table.
+    """
+    key = _rollup_key(kind)
+    model = ROLLUPS[key]
+    rows = db.query(model).order_by(getattr(model, sort).desc(), getattr(model, key)).limit(limit).all()
+    return [_rollup_response(row, key) for row in rows]
+
+
+@router.get("/rollups/{kind}/{value}", response_model=RollupResponse)
+def get_rollup(kind: str, value: str, db: Session = Depends(get_db)):
+    """
+    Precomputed totals for one user, device or merchant; a primary-key
+    lookup instead of an aggregation over transactions.
+    """
+    key = _rollup_key(kind)
+    row = db.get(ROLLUPS[key], value)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No transactions for {key} {value}.")
+    return _rollup_response(row, key)
+
+
+def _rollup_key(kind: str) -> str:
+    if kind not in ROLLUP_KINDS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown rollup: {kind}")
+    return ROLLUP_KINDS[kind]
+
+
+def _rollup_response(row, key: str) -> dict:
+    return {
+        "key": getattr(row, key),
+        "transaction_count": row.transaction_count,
+        "amount_sum": row.amount_sum,
+        "label_sum": row.label_sum,
+        "fraud_rate": row.label_sum / row.transaction_count if row.transaction_count else 0.0,
+        "first_seen": row.first_seen,
+        "last_seen": row.last_seen,
+    }
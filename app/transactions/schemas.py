@@ -0,0 +1,68 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class TransactionResponse(BaseModel):
+    transaction_id: str
+    timestamp: Optional[datetime] = None
+    user_id: Optional[str] = None
+    account_age_days: Optional[int] = None
+    customer_tier: Optional[str] = None
+    kyc_level: Optional[str] = None
+    has_multiple_accounts: Optional[bool] = None
+    linked_card_count: Optional[int] = None
+    transaction_amount: Optional[float] = None
+    transaction_currency: Optional[str] = None
+    transaction_type: Optional[str] = None
+    merchant_category: Optional[str] = None
+    merchant_id: Optional[str] = None
+    merchant_risk_score: Optional[float] = None
+    transaction_hour: Optional[int] = None
+    transaction_day_of_week: Optional[int] = None
+    is_weekend_transaction: Optional[bool] = None
+    is_nighttime_transaction: Optional[bool] = None
+    device_id: Optional[str] = None
+    device_os: Optional[str] = None
+    device_type: Optional[str] = None
+    is_vpn_used: Optional[bool] = None
+    is_proxy_used: Optional[bool] = None
+    ip_address: Optional[str] = None
+    ip_risk_score: Optional[float] = None
+    location_country: Optional[str] = None
+    location_city: Optional[str] = None
+    is_new_device: Optional[bool] = None
+    is_new_location: Optional[bool] = None
+    num_failed_attempts_24h: Optional[int] = None
+    prev_avg_txn_amount: Optional[float] = None
+    txn_amount_deviation: Optional[float] = None
+    daily_avg_spend: Optional[float] = None
+    total_spend_last_7d: Optional[float] = None
+    transaction_recency: Optional[float] = None
+    txn_velocity_1h: Optional[float] = None
+    txn_velocity_24h: Optional[float] = None
+    transaction_success_rate_24h: Optional[float] = None
+    has_multiple_devices: Optional[bool] = None
+    is_blacklisted_card: Optional[bool] = None
+    is_blacklisted_device: Optional[bool] = None
+    is_high_risk_country: Optional[bool] = None
+    distance_from_last_transaction: Optional[float] = None
+    has_chargeback_history: Optional[bool] = None
+    previous_fraudulent_activity: Optional[bool] = None
+    account_fraud_reported: Optional[bool] = None
+    is_high_risk_behavior: Optional[bool] = None
+    label: Optional[float] = None
+    upload_id: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RollupResponse(BaseModel):
+    key: str
+    transaction_count: int
+    amount_sum: float
+    label_sum: float
+    fraud_rate: float  # label_sum / transaction_count
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
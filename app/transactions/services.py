@@ -0,0 +1,199 @@
+import io
+import os
+import logging
+import pandas as pd
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, tuple_, Boolean, Integer, Float, DateTime
+from sqlalchemy.orm import Session
+from app.core.pagination import encode_cursor, decode_cursor
+from app.uploads import models
+from app.uploads.validators import DAYS_OF_WEEK, FLAG_COLUMNS
+
+
+logger = logging.getLogger(__name__)
+
+
+# Rows fetched from the server-side cursor, and written out, per batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+# Timestamp layout the upload endpoint parses
+EXPORT_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+DAY_NAMES = {number: name for name, number in DAYS_OF_WEEK.items()}
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+def transaction_filters(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[str] = None,
+    label: Optional[float] = None,
+    upload_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    merchant_id: Optional[str] = None,
+) -> list:
+    """
+    WHERE clauses for the optional filters; start is inclusive, end exclusive.
+    """
+    table = models.Transaction.__table__
+    filters = []
+    if start is not None:
+        filters.append(table.c.timestamp >= start)
+    if end is not None:
+        filters.append(table.c.timestamp < end)
+    if user_id is not None:
+        filters.append(table.c.user_id == user_id)
+    if label is not None:
+        filters.append(table.c.label == label)
+    if upload_id is not None:
+        filters.append(table.c.upload_id == upload_id)
+    if device_id is not None:
+        filters.append(table.c.device_id == device_id)
+    if merchant_id is not None:
+        filters.append(table.c.merchant_id == merchant_id)
+    return filters
+
+
+def list_transactions(
+    db: Session,
+    filters: list,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    descending: bool = True,
+) -> tuple[list, Optional[str]]:
+    """
+    One page of transactions in (timestamp, transaction_id) order, using
+    keyset pagination so deep pages cost the same as the first.
+    Raises ValueError for a bad cursor.
+    Returns (rows, cursor for the next page or None).
+    """
+    rows = db.execute(transaction_page_query(filters, cursor, limit, descending)).all()
+
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor(
+            {"timestamp": rows[-1].timestamp.isoformat(), "transaction_id": rows[-1].transaction_id}
+        )
+    return rows, next_cursor
+
+
+def transaction_page_query(filters: list, cursor: Optional[str], limit: int, descending: bool = True):
+    """
+    Each equality filter plus this order is served by one of the composite
+    indexes on models.Transaction, so a page is read in index order without
+    a sort. Rows without a timestamp are not listed.
+    """
+    table = models.Transaction.__table__
+    key = tuple_(table.c.timestamp, table.c.transaction_id)
+    stmt = select(table).where(table.c.timestamp.isnot(None), *filters)
+
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            after = (datetime.fromisoformat(values["timestamp"]), str(values["transaction_id"]))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+
+    if descending:
+        stmt = stmt.order_by(table.c.timestamp.desc(), table.c.transaction_id.desc())
+    else:
+        stmt = stmt.order_by(table.c.timestamp, table.c.transaction_id)
+    return stmt.limit(limit)
+
+
+def stream_transaction_batches(db: Session, filters: list):
+    """
+    Yields lists of at most EXPORT_BATCH_SIZE rows through a server-side
+    cursor, so only one batch is in memory at a time however many rows match.
+    """
+    stmt = select(models.Transaction.__table__).where(*filters)
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def export_csv(batches):
+    """
+    Writes rows in the layout the upload endpoint parses, so an export can
+    be uploaded again: flags as 0/1 and transaction_day_of_week as a name.
+    """
+    columns = _export_columns()
+    header = True
+    for batch in batches:
+        frame = pd.DataFrame.from_records(batch, columns=columns)
+        for name in FLAG_COLUMNS:
+            frame[name] = frame[name].astype("Int8")
+        frame["transaction_day_of_week"] = frame["transaction_day_of_week"].map(DAY_NAMES)
+        yield frame.to_csv(index=False, header=header, date_format=EXPORT_TIMESTAMP_FORMAT)
+        header = False
+    if header:
+        # No rows matched; still send the header line
+        yield ",".join(columns) + "\n"
+
+
+def export_ndjson(batches):
+    columns = _export_columns()
+    for batch in batches:
+        frame = pd.DataFrame.from_records(batch, columns=columns)
+        # Every line, the last included, already ends with a newline
+        yield frame.to_json(orient="records", lines=True, date_format="iso")
+
+
+def export_parquet(batches):
+    """
+    Writes one row group per batch and yields the bytes as they are written;
+    the footer follows the last batch.
+    """
+    schema = _arrow_schema()
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def _export_columns() -> list[str]:
+    return [column.name for column in models.Transaction.__table__.columns]
+
+
+def _arrow_schema():
+    """
+    Arrow types for models.Transaction, so every row group has the same
+    schema even when a batch holds only NULLs in a column.
+    """
+    fields = []
+    for column in models.Transaction.__table__.columns:
+        if isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
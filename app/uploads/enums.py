@@ -0,0 +1,71 @@
+import threading
+import logging
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.uploads import models
+
+
+logger = logging.getLogger(__name__)
+
+
+# Allowed labels per enum column, loaded from pg_enum on first use
+_known_labels = None
+_label_lock = threading.Lock()
+
+
+def quote_label(label: str) -> str:
+    return "'" + label.replace("'", "''") + "'"
+
+
+def known_enum_labels(engine: Engine) -> dict:
+    """
+    The allowed labels of each ENUM_COLUMNS enum, loaded from pg_enum once
+    and then served from an in-process cache. validate_transaction_rows
+    fails rows with any other label; ingest never adds labels itself.
+    Returns None on other dialects, which store the columns as text.
+    """
+    global _known_labels
+    if engine.dialect.name != "postgresql":
+        return None
+    with _label_lock:
+        if _known_labels is None:
+            _known_labels = _load_labels(engine)
+        return _known_labels
+
+
+def add_enum_labels(column: str, labels: list, engine: Engine):
+    """
+    Allows new labels for an ENUM_COLUMNS column, e.g. a new customer tier.
+    ADD VALUE runs on its own autocommit connection because a new label
+    cannot be used by the transaction that added it.
+    Raises ValueError for a column that is not an enum.
+    """
+    global _known_labels
+    if column not in models.ENUM_COLUMNS:
+        raise ValueError(f"{column} is not one of {models.ENUM_COLUMNS}")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for label in labels:
+            conn.execute(text(
+                f"ALTER TYPE {models.enum_type_name(column)} ADD VALUE IF NOT EXISTS {quote_label(label)}"
+            ))
+    logger.info(f"Added {column} labels {labels}")
+    with _label_lock:
+        _known_labels = None
+
+
+def _load_labels(engine: Engine) -> dict:
+    types = {models.enum_type_name(column): column for column in models.ENUM_COLUMNS}
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT t.typname, e.enumlabel FROM pg_enum e "
+                "JOIN pg_type t ON t.oid = e.enumtypid WHERE t.typname = ANY(:types)"
+            ),
+            {"types": list(types)},
+        ).all()
+
+    labels = {column: set() for column in models.ENUM_COLUMNS}
+    for type_name, label in rows:
+        labels[types[type_name]].add(label)
+    return labels
+
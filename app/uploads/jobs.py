@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from app.core.metrics import StageTimer
+from app.uploads import models
+from app.uploads.readers import read_upload_chunks
+from app.uploads.parallel import ingest_parallel, should_ingest_in_parallel
+from app.uploads.services import process_csv_upload, mark_upload_failed, resume_point, DUPLICATE_KEEP
+
+
+logger = logging.getLogger(__name__)
+
+
+# Number of uploads ingested concurrently in the background
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+# Where uploads are spooled while they wait for a worker
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+
+_executor = None
+
+# upload_id -> Future for jobs that are queued or running
+_jobs: dict[str, Future] = {}
+
+
+def spool_upload(file_obj) -> str:
+    """
+    Copies an upload to a temp file that outlives the request.
+    Returns the temp file path.
+    """
+    file_obj.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv", dir=UPLOAD_TMP_DIR) as tmp:
+        shutil.copyfileobj(file_obj, tmp, length=1024 * 1024)
+        return tmp.name
+
+
+def submit_upload(
+    path: str,
+    upload_id: str,
+    session_factory,
+    keep: str = DUPLICATE_KEEP,
+    csv_options: dict = None,
+) -> Future:
+    """
+    Queues a spooled upload for ingestion into an existing UploadHistory row.
+    csv_options are the read_upload_chunks arguments found by sniff_upload_header.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+    future = _executor.submit(_run_upload, path, upload_id, session_factory, keep, csv_options or {})
+    _jobs[upload_id] = future
+    future.add_done_callback(lambda _: _jobs.pop(upload_id, None))
+    return future
+
+
+def get_job(upload_id: str):
+    """
+    Returns the Future of a queued or running upload, or None once it finished.
+    """
+    return _jobs.get(upload_id)
+
+
+def shutdown():
+    """
+    Waits for queued uploads to finish; a later submit starts a fresh pool.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def _run_upload(path: str, upload_id: str, session_factory, keep: str, csv_options: dict):
+    db = session_factory()
+    upload_record = None
+    try:
+        upload_record = db.query(models.UploadHistory).filter_by(upload_id=upload_id).first()
+        if upload_record is None:
+            logger.error(f"---Upload {upload_id} disappeared before processing")
+            return
+
+        # Byte ranges cannot pick up from a row checkpoint, so resumes stay sequential
+        summary, skip_rows = resume_point(upload_record)
+        if not skip_rows and should_ingest_in_parallel(path, csv_options, keep=keep):
+            result = ingest_parallel(path, upload_record, db, keep=keep, csv_options=csv_options)
+        else:
+            timer = StageTimer()
+            with open(path, "rb") as file_obj:
+                result = process_csv_upload(
+                    read_upload_chunks(file_obj, skip_rows=skip_rows, timer=timer, **csv_options), upload_record.filename, db,
+                    keep=keep, upload_record=upload_record, summary=summary, timer=timer
+                )
+        logger.info(f"Background upload {upload_id} finished with {result['successful_rows']} successful rows, {result['failed_rows']} failed rows")
+    except Exception as e:
+        logger.error(f"---Background upload {upload_id} failed: {str(e)}")
+        if upload_record is not None and upload_record.status == "processing":
+            db.rollback()
+            mark_upload_failed(upload_record, db)
+    finally:
+        db.close()
+        os.remove(path)
@@ -1,38 +1,80 @@
 from sqlalchemy import (
-    Column, String, Integer, 
-    Float, Boolean, DateTime, JSON
+    Column, String, Integer, SmallInteger,
+    Float, Boolean, DateTime, JSON, Index
 )
-from app.core.database import Base
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import UserDefinedType
+from app.core.database import Base, SQLALCHEMY_DATABASE_URL
 from uuid import uuid4, UUID
 from datetime import datetime
 
+
+# transactions is range-partitioned by month on timestamp on PostgreSQL
+# (migration e82b5c1f9a64, see partitions.py); SQLite keeps the single table
+TRANSACTIONS_PARTITIONED = SQLALCHEMY_DATABASE_URL.startswith("postgresql")
+
+# Unique key that duplicate inserts conflict on. A partitioned table can only
+# enforce uniqueness on keys that include the partition column.
+TRANSACTION_CONFLICT_COLUMNS = ["transaction_id", "timestamp"] if TRANSACTIONS_PARTITIONED else ["transaction_id"]
+
+# Closed, low-cardinality columns stored as native enums on PostgreSQL. The
+# enum's labels are the allowed values: ingest fails rows with any other
+# label, and new ones are added deliberately (see enums.py). Open-ended
+# dimensions such as currency, merchant category and country stay text.
+ENUM_COLUMNS = [
+    "customer_tier", "kyc_level", "transaction_type", "device_os", "device_type",
+]
+
+
+class EnumLabel(UserDefinedType):
+    """
+    A PostgreSQL enum read and written as plain text. Unlike sqlalchemy.Enum
+    it does not pin the labels in code; they live in the database type.
+    """
+    cache_ok = True
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def get_col_spec(self, **kw):
+        return self.name
+
+
+def enum_type_name(column: str) -> str:
+    return f"{column}_enum"
+
+
+def _label(column: str):
+    return String().with_variant(EnumLabel(enum_type_name(column)), "postgresql")
+
+
 class Transaction(Base):
     __tablename__ = "transactions"
 
     transaction_id = Column(String, primary_key=True, index=True)
-    timestamp = Column(DateTime)  
+    timestamp = Column(DateTime, primary_key=TRANSACTIONS_PARTITIONED)
     user_id = Column(String)
     account_age_days = Column(Integer)
-    customer_tier = Column(String)
-    kyc_level = Column(String)
+    customer_tier = Column(_label("customer_tier"))
+    kyc_level = Column(_label("kyc_level"))
     has_multiple_accounts = Column(Boolean)
     linked_card_count = Column(Integer)
     transaction_amount = Column(Float)
     transaction_currency = Column(String)
-    transaction_type = Column(String)
+    transaction_type = Column(_label("transaction_type"))
     merchant_category = Column(String)
     merchant_id = Column(String)
     merchant_risk_score = Column(Float)
-    transaction_hour = Column(Integer)
-    transaction_day_of_week = Column(Integer)
+    transaction_hour = Column(SmallInteger)
+    transaction_day_of_week = Column(SmallInteger)
     is_weekend_transaction = Column(Boolean)
     is_nighttime_transaction = Column(Boolean)
     device_id = Column(String)
-    device_os = Column(String)
-    device_type = Column(String)
+    device_os = Column(_label("device_os"))
+    device_type = Column(_label("device_type"))
     is_vpn_used = Column(Boolean)
     is_proxy_used = Column(Boolean)
-    ip_address = Column(String)
+    ip_address = Column(String().with_variant(postgresql.INET(), "postgresql"))
     ip_risk_score = Column(Float)
     location_country = Column(String)
     location_city = Column(String)
@@ -57,6 +99,18 @@ class Transaction(Base):
     account_fraud_reported = Column(Boolean)
     is_high_risk_behavior = Column(Boolean)
     label = Column(Float)
+    upload_id = Column(String(36), index=True)  # UploadHistory.upload_id that inserted the row
+
+    __table_args__ = (
+        # Back the filtered, keyset-paginated reads of GET /api/v1/transactions/;
+        # transaction_id is the keyset tie-breaker, so pages are served in index order
+        Index("ix_transactions_timestamp_transaction_id", "timestamp", "transaction_id"),
+        Index("ix_transactions_user_id_timestamp", "user_id", "timestamp", "transaction_id"),
+        Index("ix_transactions_device_id_timestamp", "device_id", "timestamp", "transaction_id"),
+        Index("ix_transactions_merchant_id_timestamp", "merchant_id", "timestamp", "transaction_id"),
+        Index("ix_transactions_label_timestamp", "label", "timestamp", "transaction_id"),
+        {"postgresql_partition_by": "RANGE (timestamp)"} if TRANSACTIONS_PARTITIONED else {},
+    )
 
 class UploadHistory(Base):
     __tablename__ = "upload_history"
@@ -69,4 +123,10 @@ class UploadHistory(Base):
     rows_processed = Column(Integer, nullable=False)
     status = Column(String, default="success")  # success, partial, failed
     # user_ip = Column(String, nullable=True)
-    details = Column(JSON, nullable=True)  # to store additional info eg. errors
\ No newline at end of file
+    details = Column(JSON, nullable=True)  # to store additional info eg. errors
+    content_sha256 = Column(String(64), index=True, nullable=True)  # hex digest of the uploaded bytes
+
+    __table_args__ = (
+        # Backs keyset pagination of /history/ (newest first)
+        Index("ix_upload_history_uploaded_at_id", "uploaded_at", "id"),
+    )
\ No newline at end of file
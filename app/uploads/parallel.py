@@ -0,0 +1,243 @@
+import io
+import os
+import time
+import logging
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+from app.core import database
+from app.core.metrics import StageTimer, TimedFile
+from app.uploads import models
+from app.uploads.readers import read_csv_chunks
+from app.uploads.services import (
+    new_summary, process_chunk, merge_summary, checkpoint_upload,
+    finish_upload, mark_upload_failed, remember_transaction_ids, timed_chunks,
+    record_chunk_metrics, DUPLICATE_KEEP, TRANSACTION_ID_CACHE_SIZE
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Worker processes per upload; 1 disables parallel ingest
+PARALLEL_INGEST_WORKERS = int(os.getenv("PARALLEL_INGEST_WORKERS", "1"))
+
+# Files smaller than this are ingested on a single core
+PARALLEL_INGEST_MIN_BYTES = int(os.getenv("PARALLEL_INGEST_MIN_BYTES", str(64 * 1024 * 1024)))
+
+# Seconds between heartbeats while no worker finishes; keep it well under
+# UPLOAD_STALE_SECONDS so a long range does not look abandoned
+PARALLEL_HEARTBEAT_SECONDS = int(os.getenv("PARALLEL_HEARTBEAT_SECONDS", "60"))
+
+# Per-process session factory, set up by _init_worker
+_worker_session = None
+
+
+def should_ingest_in_parallel(
+    path: str,
+    csv_options: dict = None,
+    database_url: str = database.SQLALCHEMY_DATABASE_URL,
+    keep: str = DUPLICATE_KEEP,
+) -> bool:
+    """
+    Parallel ingest needs a server database; SQLite allows a single writer.
+    keep="last" needs the whole file in one chunk, so it is never split.
+    UTF-16 files are excluded because their newlines are two bytes wide, and
+    compressed and columnar files because they cannot be split by byte offset.
+    """
+    csv_options = csv_options or {}
+    return (
+        PARALLEL_INGEST_WORKERS > 1
+        and keep == "first"
+        and not csv_options.get("encoding", "utf-8").startswith("utf-16")
+        and not csv_options.get("compression")
+        and not csv_options.get("file_format")
+        and not database_url.startswith("sqlite")
+        and os.path.getsize(path) >= PARALLEL_INGEST_MIN_BYTES
+    )
+
+
+def split_byte_ranges(path: str, parts: int) -> tuple[bytes, list[tuple[int, int]]]:
+    """
+    Splits the data section of a CSV file into at most `parts` byte ranges
+    that each start at the beginning of a line.
+    Returns the header line and the (start, end) offsets.
+    Quoted fields containing newlines are not supported.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as file_obj:
+        header = file_obj.readline()
+        bounds = [file_obj.tell()]
+
+        for i in range(1, parts):
+            target = bounds[0] + (size - bounds[0]) * i // parts
+            if target <= bounds[-1]:
+                continue
+            # Step back one byte so a target that already starts a line is kept
+            file_obj.seek(target - 1)
+            file_obj.readline()
+            offset = file_obj.tell()
+            if offset >= size:
+                break
+            if offset > bounds[-1]:
+                bounds.append(offset)
+
+        bounds.append(size)
+
+    ranges = [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+    return header, ranges
+
+
+def ingest_parallel(
+    path: str,
+    upload_record: models.UploadHistory,
+    db: Session,
+    workers: int = PARALLEL_INGEST_WORKERS,
+    keep: str = DUPLICATE_KEEP,
+    csv_options: dict = None,
+    database_url: str = database.SQLALCHEMY_DATABASE_URL,
+) -> dict:
+    """
+    Parses and inserts byte ranges of a CSV file in worker processes, each
+    over its own engine connection, and aggregates their counts into one
+    UploadHistory record. The record is checkpointed as each range finishes
+    and at least every PARALLEL_HEARTBEAT_SECONDS in between.
+    Returns summary info for response.
+    """
+    header, ranges = split_byte_ranges(path, workers)
+    summary = new_summary()
+    started = time.perf_counter()
+
+    try:
+        # Spawned workers start clean instead of inheriting the parent's
+        # engine, sockets and threads through fork
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(database_url,),
+        ) as pool:
+            futures = [
+                pool.submit(_ingest_range, path, start, end, header, keep, csv_options or {}, upload_record.upload_id)
+                for start, end in ranges
+            ]
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=PARALLEL_HEARTBEAT_SECONDS, return_when=FIRST_COMPLETED)
+                if not done:
+                    # Counts are unchanged; the commit only stamps a fresh heartbeat
+                    checkpoint_upload(upload_record, summary, db)
+                for future in done:
+                    part = future.result()
+                    inserted_keys = part.pop("inserted_keys")
+                    merge_summary(summary, part)
+                    checkpoint_upload(upload_record, summary, db)
+                    # Workers exit with their own caches, so the parent remembers their rows
+                    remember_transaction_ids(inserted_keys)
+                    record_chunk_metrics(part)
+
+        # Workers overlap, so the upload's total is wall-clock, not their sum
+        summary["timings"]["total"] = time.perf_counter() - started
+        return finish_upload(upload_record, summary, db)
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"---Error during parallel ingest of {upload_record.filename}: {str(e)}")
+        mark_upload_failed(upload_record, db)
+        raise
+
+
+def _init_worker(database_url: str):
+    global _worker_session
+    engine = create_engine(database_url, poolclass=NullPool)
+    _worker_session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _ingest_range(
+    path: str, start: int, end: int, header: bytes, keep: str, csv_options: dict, upload_id: str
+) -> dict:
+    """
+    Worker entry point: runs the chunk pipeline over one byte range.
+    Row numbers in errors are relative to the range. Recent in-file repeats
+    are tracked within the range; older ones and repeats across ranges fall through to the
+    database dedup and count as duplicate_rows. Workers skip the ID cache,
+    which would be warmed per process and lost on exit. Stage timings come
+    back in the summary, as the worker's own metrics registry is not served,
+    and so do the dedup keys of the newest TRANSACTION_ID_CACHE_SIZE rows it
+    inserted ("inserted_keys"), for the parent's ID cache.
+    """
+    summary = new_summary()
+    timer = StageTimer()
+    db = _worker_session()
+    seen_ids = OrderedDict()
+    # Only the newest keys would fit in the parent's cache anyway
+    keys = deque(maxlen=max(TRANSACTION_ID_CACHE_SIZE, 0))
+    try:
+        with open(path, "rb") as file_obj:
+            stream = TimedFile(io.BufferedReader(_ByteRange(file_obj, start, end, prefix=header)), timer, "read")
+            for df in timed_chunks(read_csv_chunks(stream, timer=timer, **csv_options), timer):
+                inserted_keys = process_chunk(
+                    df, db, summary, keep, upload_id=upload_id, timer=timer, seen_ids=seen_ids,
+                    use_id_cache=False,
+                )
+                with timer.stage("commit"):
+                    db.commit()
+                keys.extend(inserted_keys)
+    finally:
+        db.close()
+    timer.flush_into(summary["timings"])
+    summary["inserted_keys"] = list(keys)
+    return summary
+
+
+class _ByteRange(io.RawIOBase):
+    """
+    Read-only view of file_obj[start:end], preceded by prefix. It can be
+    rewound to its beginning, which read_csv_chunks needs to re-read rows as
+    text.
+    """
+
+    def __init__(self, file_obj, start: int, end: int, prefix: bytes = b""):
+        self._file = file_obj
+        self._start = start
+        self._end = end
+        self._header = prefix
+        self.seek(0)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence != io.SEEK_SET or offset != 0:
+            raise io.UnsupportedOperation("_ByteRange can only be rewound to its start")
+        self._prefix = self._header
+        self._remaining = self._end - self._start
+        self._position = 0
+        self._file.seek(self._start)
+        return 0
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, buffer):
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            self._position += n
+            return n
+
+        n = min(len(buffer), self._remaining)
+        if n <= 0:
+            return 0
+        data = self._file.read(n)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        self._position += len(data)
+        return len(data)
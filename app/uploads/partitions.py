@@ -0,0 +1,140 @@
+import os
+import threading
+import logging
+from datetime import date, datetime
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.core import database
+from app.uploads import models
+
+
+logger = logging.getLogger(__name__)
+
+
+# Monthly partitions created ahead of the current month at startup
+PARTITION_MONTHS_AHEAD = int(os.getenv("TRANSACTIONS_PARTITION_MONTHS_AHEAD", "3"))
+
+# Catches rows outside every monthly partition
+DEFAULT_PARTITION = "transactions_default"
+
+# Partitions known to exist, so ingest only issues DDL for a new month
+_known_partitions = set()
+_partition_lock = threading.Lock()
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"transactions_y{month.year}m{month.month:02d}"
+
+
+def partition_ddl(month: date) -> str:
+    """
+    CREATE statement for the partition holding [month, next month).
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF transactions "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+    )
+
+
+def months_between(first: date, last: date) -> list[date]:
+    """
+    Every month start from first's month through last's month.
+    """
+    months = [month_start(first)]
+    while months[-1] < month_start(last):
+        months.append(next_month(months[-1]))
+    return months
+
+
+def ensure_transaction_partitions(months, engine: Engine = None):
+    """
+    Creates the monthly partitions that do not exist yet, each in its own
+    autocommit transaction so the DDL never holds locks inside an ingest.
+    A month whose rows already went to the default partition cannot be split
+    out online; it is logged and its rows keep landing in the default.
+    """
+    missing = sorted({month_start(month) for month in months} - _known_partitions)
+    if not missing:
+        return
+
+    engine = engine or database.engine
+    with _partition_lock, engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for month in missing:
+            try:
+                conn.execute(text(partition_ddl(month)))
+            except Exception as e:
+                logger.error(f"---Could not create partition {partition_name(month)}: {str(e)}")
+            _known_partitions.add(month)
+
+
+def ensure_partitions_for(timestamps: pd.Series, engine: Engine = None):
+    """
+    Makes sure every month in a chunk's timestamps has its partition before
+    the chunk is inserted.
+    """
+    if not models.TRANSACTIONS_PARTITIONED:
+        return
+    months = timestamps.dropna().dt.to_period("M").unique()
+    ensure_transaction_partitions((period.start_time for period in months), engine)
+
+
+def ensure_upcoming_partitions(today: date = None, engine: Engine = None):
+    """
+    Creates partitions for the current month and PARTITION_MONTHS_AHEAD
+    months after it; run at startup.
+    """
+    if not models.TRANSACTIONS_PARTITIONED:
+        return
+    first = month_start(today or datetime.utcnow())
+    last = first
+    for _ in range(PARTITION_MONTHS_AHEAD):
+        last = next_month(last)
+    ensure_transaction_partitions(months_between(first, last), engine)
+
+
+def check_partitioning(engine: Engine = None):
+    """
+    Compares TRANSACTIONS_PARTITIONED with the table in the database; run at
+    startup. The models' primary key and conflict columns follow it, so a
+    mismatch would fail or misdirect every insert.
+    Raises RuntimeError on a mismatch.
+    """
+    engine = engine or database.engine
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.connect() as conn:
+        partitioned = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = 'transactions' AND pg_table_is_visible(c.oid))"
+        )).scalar()
+    if partitioned != models.TRANSACTIONS_PARTITIONED:
+        raise RuntimeError(
+            f"The transactions table is {'' if partitioned else 'not '}partitioned but the models expect it "
+            f"{'' if models.TRANSACTIONS_PARTITIONED else 'not '}to be; compare `alembic current` with "
+            f"`alembic heads` and check the table was not altered by hand"
+        )
+
+
+def detach_partition(month: date, engine: Engine = None):
+    """
+    Detaches a month from transactions; its rows stay in the detached table,
+    which can then be archived or dropped without touching other months.
+    The transaction ID cache is cleared, as it may hold the month's keys.
+    """
+    # services imports this module, so its cache is imported on use
+    from app.uploads.services import clear_transaction_id_cache
+
+    engine = engine or database.engine
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"ALTER TABLE transactions DETACH PARTITION {partition_name(month_start(month))}"))
+    _known_partitions.discard(month_start(month))
+    clear_transaction_id_cache()
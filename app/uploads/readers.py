@@ -0,0 +1,395 @@
+import io
+import os
+import csv
+import gzip
+import hashlib
+import pandas as pd
+import logging
+from app.core.metrics import StageTimer, TimedFile
+from app.uploads.validators import EXPECTED_COLUMNS, TRANSACTION_DTYPES, TRANSACTION_TEXT_DTYPES
+
+
+logger = logging.getLogger(__name__)
+
+
+# Rows per DataFrame chunk when streaming an upload
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "50000"))
+
+# "c" (pandas' C parser) or "pyarrow" (needs the optional pyarrow package)
+CSV_PARSER_ENGINE = os.getenv("CSV_PARSER_ENGINE", "c")
+
+# Bytes per block handed to the pyarrow parser
+PYARROW_BLOCK_SIZE = int(os.getenv("PYARROW_BLOCK_SIZE", str(16 * 1024 * 1024)))
+
+# Bytes read from the start of an upload to sniff its header
+HEADER_SNIFF_BYTES = 64 * 1024
+
+# Delimiters recognised when sniffing a header
+CSV_DELIMITERS = ",;\t|"
+
+_EXPECTED = set(EXPECTED_COLUMNS)
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pa_csv = None
+    pq = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Accepted upload file names -> (file format, compression)
+UPLOAD_SUFFIXES = {
+    ".csv": ("csv", None),
+    ".csv.gz": ("csv", "gzip"),
+    ".csv.zst": ("csv", "zstd"),
+    ".parquet": ("parquet", None),
+    ".arrow": ("arrow", None),
+    ".feather": ("arrow", None),
+}
+
+# Raised while reading a corrupt or truncated compressed stream
+_DECOMPRESSION_ERRORS = (gzip.BadGzipFile, EOFError) + ((zstandard.ZstdError,) if zstandard else ())
+
+
+def upload_format(file_name: str) -> tuple:
+    """
+    Maps an upload's file name to (file format, compression): "csv" with
+    None, "gzip" or "zstd", or "parquet"/"arrow" with None.
+    Raises ValueError for any other file type, or when the package a format
+    needs is not installed.
+    """
+    for suffix, (file_format, compression) in UPLOAD_SUFFIXES.items():
+        if file_name.lower().endswith(suffix):
+            if compression == "zstd" and zstandard is None:
+                raise ValueError("zstd uploads need the zstandard package.")
+            if file_format != "csv" and pa is None:
+                raise ValueError(f"{file_format} uploads need the pyarrow package.")
+            return file_format, compression
+    raise ValueError(f"Unsupported file type: {file_name}")
+
+
+def decompressed(file_obj, compression: str = None):
+    """
+    Wraps a binary file object so reads return decompressed bytes.
+    Decompression is streamed; the payload is never held in memory whole.
+    """
+    if compression is None:
+        return file_obj
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=file_obj, mode="rb")
+    if compression == "zstd":
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(file_obj, closefd=False))
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def hash_upload(file_obj) -> str:
+    """
+    Streams the whole upload through SHA-256 in 1MB blocks, then rewinds.
+    Returns the hex digest.
+    """
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for block in iter(lambda: file_obj.read(1024 * 1024), b""):
+        digest.update(block)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def sniff_upload_header(file_obj, file_name: str):
+    """
+    Reads the column names of any supported upload without reading its body,
+    plus the reader options read_upload_chunks needs for it.
+    Returns None for an empty file.
+    """
+    file_format, compression = upload_format(file_name)
+    if file_format == "csv":
+        return sniff_csv_header(file_obj, compression)
+    return _sniff_columnar_header(file_obj, file_format)
+
+
+def read_upload_chunks(file_obj, file_format: str = "csv", timer: StageTimer = None, **options):
+    """
+    Streams any supported upload in DataFrame chunks; options come from
+    sniff_upload_header. With a timer, time spent reading the file is booked
+    to the "read" stage.
+    """
+    if timer is not None:
+        file_obj = TimedFile(file_obj, timer, "read")
+    if file_format == "csv":
+        return read_csv_chunks(file_obj, timer=timer, **options)
+    return _as_parser_errors(_read_columnar_chunks(file_obj, file_format, **options))
+
+
+def sniff_csv_header(file_obj, compression: str = None):
+    """
+    Reads only the start of an upload to detect its encoding, delimiter and
+    column names, then rewinds. No DataFrame is built; a compressed upload
+    is decompressed only as far as the sample.
+    Returns {"encoding", "delimiter", "compression", "columns"}, or None for
+    an empty file.
+    """
+    file_obj.seek(0)
+    try:
+        sample = decompressed(file_obj, compression).read(HEADER_SNIFF_BYTES)
+    except _DECOMPRESSION_ERRORS as e:
+        raise pd.errors.ParserError(f"Could not decompress upload: {e}") from e
+    file_obj.seek(0)
+    if not sample:
+        return None
+
+    encoding = _sniff_encoding(sample, truncated=len(sample) == HEADER_SNIFF_BYTES)
+    lines = sample.decode(encoding, errors="ignore").splitlines()
+    header = lines[0] if lines else ""
+
+    # The candidate that splits the header the most wins; "," if none appear
+    delimiter = max(CSV_DELIMITERS, key=header.count)
+    if not header.count(delimiter):
+        delimiter = ","
+
+    columns = [column.strip() for column in next(csv.reader([header], delimiter=delimiter), [])]
+    return {"encoding": encoding, "delimiter": delimiter, "compression": compression, "columns": columns}
+
+
+def _sniff_encoding(sample: bytes, truncated: bool) -> str:
+    """
+    BOMs win; otherwise UTF-8 if the sample decodes, else Latin-1.
+    """
+    if sample.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    if sample.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the sample size is still UTF-8
+        if not (truncated and e.start >= len(sample) - 3):
+            return "latin-1"
+    return "utf-8"
+
+
+def read_csv_chunks(
+    file_obj,
+    chunksize: int = None,
+    engine: str = None,
+    encoding: str = "utf-8",
+    delimiter: str = ",",
+    skip_rows: int = 0,
+    compression: str = None,
+    timer: StageTimer = None,
+):
+    """
+    Streams a CSV from a binary file object in fixed-size DataFrame chunks.
+    Only one chunk is held in memory at a time, so peak memory does not grow
+    with the size of the upload.
+    Columns are parsed with TRANSACTION_DTYPES instead of being inferred, and
+    columns outside EXPECTED_COLUMNS are dropped. A chunk with a value those
+    dtypes cannot hold is re-read with TRANSACTION_TEXT_DTYPES, so the bad
+    value fails its row in validation rather than the whole upload.
+    skip_rows data rows after the header are skipped, e.g. to resume an
+    upload; the row index still counts from the first data row.
+    compression ("gzip" or "zstd") is undone on the fly, and booked to the
+    timer's "decode" stage.
+    """
+    engine = engine or CSV_PARSER_ENGINE
+    if engine == "pyarrow" and pa_csv is None:
+        logger.warning("---CSV_PARSER_ENGINE=pyarrow but pyarrow is not installed, using the C parser")
+        engine = "c"
+    start = file_obj.tell() if file_obj.seekable() else None
+
+    def open_chunks(offset: int, dtypes: dict, reopen: bool = True):
+        # A reopen starts over from the raw, still compressed, bytes
+        if reopen:
+            file_obj.seek(start)
+        stream = decompressed(file_obj, compression)
+        if timer is not None and compression:
+            stream = TimedFile(stream, timer, "decode")
+        if engine == "pyarrow":
+            return _read_csv_chunks_pyarrow(stream, encoding, delimiter, offset, dtypes)
+        return _offset_index(pd.read_csv(
+            stream,
+            chunksize=chunksize or CSV_CHUNK_SIZE,
+            encoding=encoding,
+            sep=delimiter,
+            engine="c",
+            dtype=dtypes,
+            usecols=lambda column: column in _EXPECTED,
+            # A callable, as pandas turns a range into a set of every skipped row
+            skiprows=(lambda row: 0 < row <= offset) if offset else None,
+        ), offset)
+
+    return _as_parser_errors(_with_text_fallback(open_chunks, skip_rows, start is not None))
+
+
+def _with_text_fallback(open_chunks, skip_rows: int, can_reopen: bool):
+    """
+    Yields typed chunks; one that fails to convert is re-read with text
+    dtypes from its first row. The failed reader is dropped, not resumed:
+    the C parser cannot continue after a conversion error. Each reopen
+    rescans the file from the top, so only the first bad chunk goes back to
+    typed parsing afterwards; from the second one on the rest is read as text.
+    """
+    offset = skip_rows
+    chunks = open_chunks(offset, TRANSACTION_DTYPES, reopen=False)
+    as_text = False
+    failures = 0
+    while True:
+        try:
+            df = next(chunks)
+        except StopIteration:
+            return
+        except pd.errors.ParserError:
+            raise
+        except (ValueError, TypeError) as e:
+            if as_text or not can_reopen:
+                raise
+            failures += 1
+            logger.warning(f"---Rows from {offset + 1} do not fit the declared dtypes, reading them as text: {e}")
+            chunks.close()
+            chunks = open_chunks(offset, TRANSACTION_TEXT_DTYPES)
+            as_text = True
+            continue
+        offset += len(df)
+        yield df
+        if as_text and failures == 1:
+            chunks.close()
+            chunks = open_chunks(offset, TRANSACTION_DTYPES)
+            as_text = False
+
+
+def _offset_index(reader, offset: int):
+    # Closing the reader detaches it from the caller's file rather than
+    # leaving that to garbage collection, which would close the file too
+    with reader:
+        for df in reader:
+            if offset:
+                df.index = df.index + offset
+            yield df
+
+
+def _as_parser_errors(chunks):
+    """
+    Re-raises undecodable input, such as a corrupt compressed stream, as
+    ParserError so it is reported as a malformed CSV.
+    """
+    try:
+        yield from chunks
+    except pd.errors.ParserError:
+        raise
+    except (ValueError, TypeError) + _DECOMPRESSION_ERRORS as e:
+        raise pd.errors.ParserError(str(e)) from e
+
+
+def _pyarrow_type(dtype):
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype == "float32":
+        return pa.float32()
+    if dtype == "float64":
+        return pa.float64()
+    return pa.string()
+
+
+def _read_csv_chunks_pyarrow(file_obj, encoding: str, delimiter: str, skip_rows: int = 0, dtypes: dict = None):
+    """
+    Incremental pyarrow parse; yields one DataFrame per record batch with a
+    row index that continues across batches, like the C parser's chunks.
+    """
+    reader = pa_csv.open_csv(
+        file_obj,
+        read_options=pa_csv.ReadOptions(
+            block_size=PYARROW_BLOCK_SIZE, encoding=encoding, skip_rows_after_names=skip_rows
+        ),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: _pyarrow_type(dtype) for name, dtype in (dtypes or TRANSACTION_DTYPES).items()},
+            strings_can_be_null=True,
+        ),
+    )
+    offset = skip_rows
+    for batch in reader:
+        df = batch.to_pandas()
+        df = df[[column for column in df.columns if column in _EXPECTED]]
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        offset += len(df)
+        yield df
+
+
+def _sniff_columnar_header(file_obj, file_format: str):
+    """
+    Column names come from the Parquet footer or the Arrow IPC schema; no
+    row data is decoded.
+    """
+    file_obj.seek(0, os.SEEK_END)
+    empty = file_obj.tell() == 0
+    file_obj.seek(0)
+    if empty:
+        return None
+    try:
+        if file_format == "parquet":
+            columns = pq.ParquetFile(file_obj).schema_arrow.names
+        else:
+            columns = _open_ipc(file_obj).schema.names
+    except (pa.ArrowException, ValueError) as e:
+        raise pd.errors.ParserError(f"Could not read {file_format} file: {e}") from e
+    finally:
+        file_obj.seek(0)
+    return {"file_format": file_format, "columns": columns}
+
+
+def _open_ipc(file_obj):
+    """
+    Opens Arrow IPC in the random-access file format, or else the stream format.
+    """
+    try:
+        return pa.ipc.open_file(file_obj)
+    except pa.ArrowInvalid:
+        file_obj.seek(0)
+        return pa.ipc.open_stream(file_obj)
+
+
+def _read_columnar_chunks(file_obj, file_format: str, skip_rows: int = 0):
+    """
+    Yields typed record batches from Parquet or Arrow IPC as DataFrames of
+    at most CSV_CHUNK_SIZE rows, with the same continuous row index as the
+    CSV readers. Nothing is parsed from text and no types are inferred.
+    Parquet row groups wholly before skip_rows are never read.
+    """
+    offset = 0
+    if file_format == "parquet":
+        parquet = pq.ParquetFile(file_obj)
+        row_groups = []
+        for i in range(parquet.num_row_groups):
+            rows = parquet.metadata.row_group(i).num_rows
+            if not row_groups and offset + rows <= skip_rows:
+                offset += rows
+                continue
+            row_groups.append(i)
+        batches = parquet.iter_batches(
+            batch_size=CSV_CHUNK_SIZE,
+            row_groups=row_groups,
+            columns=[name for name in parquet.schema_arrow.names if name in _EXPECTED],
+        )
+    else:
+        reader = _open_ipc(file_obj)
+        if isinstance(reader, pa.ipc.RecordBatchFileReader):
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            batches = reader
+
+    for batch in batches:
+        if offset < skip_rows:
+            skipped = min(skip_rows - offset, batch.num_rows)
+            batch = batch.slice(skipped)
+            offset += skipped
+        for start in range(0, batch.num_rows, CSV_CHUNK_SIZE):
+            df = batch.slice(start, CSV_CHUNK_SIZE).to_pandas()
+            df = df[[column for column in df.columns if column in _EXPECTED]]
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
@@ -1,16 +1,27 @@
+import os
 from urllib import request
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Request, Response, status
 import pandas as pd
-import io
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.uploads.services import process_csv_upload
-from app.uploads.validators import validate_csv_columns
+from typing import Optional
+from datetime import datetime
+from app.core.database import get_db, get_session_factory
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.metrics import StageTimer
+from app.uploads.services import (
+    process_csv_upload, create_upload_record, find_upload_by_hash, reopen_upload,
+    resume_point, upload_result, upload_is_stale, DUPLICATE_KEEP
+)
+from app.uploads.validators import validate_csv_header
+from app.uploads.readers import read_upload_chunks, sniff_upload_header, hash_upload, upload_format
 from app.uploads.schemas import (
-    UploadResponse, UploadHistoryResponse
+    UploadResponse, UploadHistoryResponse, UploadHistorySummaryResponse,
+    UploadStatusResponse, UploadSessionCreate
 )
-from app.uploads import models
+from app.uploads import models, jobs, staging
 import logging
 
 
@@ -22,73 +33,355 @@ router = APIRouter(
 )
 
 
+def _open_upload(file_name: str, content_hash: str, previous, db: Session):
+    """
+    Resumes a failed or abandoned upload of the same content, or starts a new one.
+    """
+    if previous is not None:
+        logger.info(f"Resuming upload {previous.upload_id} for {file_name}")
+        return reopen_upload(previous, db)
+    return create_upload_record(file_name, db, content_sha256=content_hash)
+
+
+def _enqueue_upload(
+    file_obj, file_name: str, db: Session, session_factory, keep: str,
+    csv_options: dict, content_hash: str, previous, spooled_path: str = None
+) -> str:
+    path = spooled_path or jobs.spool_upload(file_obj)
+    upload_record = _open_upload(file_name, content_hash, previous, db)
+    jobs.submit_upload(path, upload_record.upload_id, session_factory, keep=keep, csv_options=csv_options)
+    return upload_record.upload_id
+
+
+def _ingest_upload(file_obj, file_name: str, db: Session, keep: str, csv_options: dict, content_hash: str, previous) -> dict:
+    upload_record = _open_upload(file_name, content_hash, previous, db)
+    summary, skip_rows = resume_point(upload_record)
+    timer = StageTimer()
+    return process_csv_upload(
+        read_upload_chunks(file_obj, skip_rows=skip_rows, timer=timer, **csv_options), file_name, db,
+        keep=keep, upload_record=upload_record, summary=summary, timer=timer
+    )
+
+
 @router.post("/csv/", status_code=status.HTTP_201_CREATED, response_model=UploadResponse)
-async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_csv(
+    file: UploadFile = File(...),
+    keep: str = Query(DUPLICATE_KEEP, pattern="^(first|last)$"),
+    background: bool = False,
+    db: Session = Depends(get_db),
+    session_factory = Depends(get_session_factory)
+):
     """
     Upload a CSV file, parse it, and save transactions in the database.
+    .csv.gz and .csv.zst files are decompressed as they are parsed; Parquet
+    (.parquet) and Arrow IPC (.arrow, .feather) files are read as typed
+    columns.
+    keep chooses which row wins when a transaction_id repeats within the file;
+    keep=last is rejected for files longer than one chunk.
+    With background=true the file is queued and 202 is returned with an
+    upload_id to poll at GET /api/v1/uploads/{upload_id}/.
+    Re-sending a file with identical content returns the earlier result, or
+    resumes the earlier upload after its last committed chunk if it
+    failed.
     """
+    # client_ip = request.client.host if request.client else None
+
+    file_name = file.filename
+    if not _is_supported_upload(file_name):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"success": False, "message": "Invalid file type. Please upload a valid CSV file."}
+        )
+
+    response, _ = await _handle_upload(file.file, file_name, keep, background, db, session_factory)
+    return response
+
+
+def _is_supported_upload(file_name: Optional[str]) -> bool:
     try:
-        # client_ip = request.client.host if request.client else None
-        
-        file_name = file.filename
-        if not file_name.endswith(".csv"):
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"success": False, "message": "Invalid file type. Please upload a valid CSV file."}
+        upload_format(file_name or "")
+    except ValueError:
+        return False
+    return True
+
+
+@router.post("/sessions/", status_code=status.HTTP_201_CREATED, response_model=UploadResponse)
+async def create_upload_session(body: UploadSessionCreate):
+    """
+    Start a chunked upload for files too large for one request.
+    PUT the file's bytes in order-numbered parts (any order, in parallel,
+    retried as needed) to /sessions/{session_id}/parts/{part_number}, then
+    POST /sessions/{session_id}/complete to ingest the joined file.
+    """
+    if not _is_supported_upload(body.filename):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"success": False, "message": "Invalid file type. Please upload a valid CSV file."}
+        )
+
+    # Abandoned sessions are cleared as new ones start
+    await run_in_threadpool(staging.sweep_sessions)
+    session = await run_in_threadpool(staging.create_session, body.filename)
+    return {"success": True, "message": "Upload session created", "data": session}
+
+
+@router.get("/sessions/{session_id}/", response_model=UploadResponse)
+async def get_upload_session(session_id: str):
+    """
+    List the parts received so far, e.g. to find which ones to retry.
+    """
+    try:
+        session = await run_in_threadpool(staging.get_session, session_id)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found.")
+    return {"success": True, "message": "Upload session found", "data": session}
+
+
+@router.delete("/sessions/{session_id}/", response_model=UploadResponse)
+async def abort_upload_session(session_id: str):
+    """
+    Abort a chunked upload and delete the parts received so far.
+    """
+    try:
+        await run_in_threadpool(staging.get_session, session_id)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found.")
+    await run_in_threadpool(staging.discard, session_id)
+    return {"success": True, "message": "Upload session aborted", "data": {"session_id": session_id}}
+
+
+@router.put("/sessions/{session_id}/parts/{part_number}", response_model=UploadResponse)
+async def upload_session_part(session_id: str, part_number: int, request: Request):
+    """
+    Store one part; the raw request body is streamed to disk.
+    Re-sending a part number replaces it.
+    """
+    try:
+        part = await staging.write_part(session_id, part_number, request.stream())
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found.")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"success": True, "message": "Part stored", "data": part}
+
+
+@router.post("/sessions/{session_id}/complete", status_code=status.HTTP_201_CREATED, response_model=UploadResponse)
+async def complete_upload_session(
+    session_id: str,
+    keep: str = Query(DUPLICATE_KEEP, pattern="^(first|last)$"),
+    background: bool = False,
+    db: Session = Depends(get_db),
+    session_factory = Depends(get_session_factory)
+):
+    """
+    Join the parts in order and ingest the file as POST /csv/ would.
+    """
+    try:
+        path, file_name = await run_in_threadpool(staging.assemble, session_id)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found.")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    queued = False
+    try:
+        with open(path, "rb") as file_obj:
+            response, queued = await _handle_upload(
+                file_obj, file_name, keep, background, db, session_factory, spooled_path=path
             )
+    finally:
+        # A queued job removes the file once it is ingested
+        if not queued:
+            os.remove(path)
+    return response
+
 
-        # Read CSV into a DataFrame
-        content = await file.read()
-        if not content:
+async def _handle_upload(
+    file_obj, file_name: str, keep: str, background: bool, db: Session, session_factory,
+    spooled_path: str = None
+):
+    """
+    Validates and ingests an uploaded file, or queues it with background.
+    spooled_path is a file on disk with the same bytes that a queued job may
+    take over instead of copying file_obj.
+    Returns (response, whether a job was queued).
+    """
+    try:
+        # Fast reject: check the header before any DataFrame is built
+        csv_options = await run_in_threadpool(sniff_upload_header, file_obj, file_name)
+        if csv_options is None:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"success": False, "message": "Empty CSV file."}
-            )
-
-        df = pd.read_csv(io.StringIO(content.decode("utf-8")))
+            ), False
 
-        # Validate CSV columns
-        is_valid, missing_cols = validate_csv_columns(df)
+        is_valid, missing_cols = validate_csv_header(csv_options.pop("columns"))
         if not is_valid:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"success": False, "message": f"Missing columns: {missing_cols}"}
+            ), False
+
+        # Identical content is answered from, or resumes, the earlier upload
+        content_hash = await run_in_threadpool(hash_upload, file_obj)
+        previous = await run_in_threadpool(find_upload_by_hash, content_hash, db)
+        if previous is not None and previous.status in ("success", "partial"):
+            # Replay the original response so retries look like the first attempt
+            return JSONResponse(
+                status_code=status.HTTP_201_CREATED,
+                content={"success": True, "message": "File already processed", "data": upload_result(previous)}
+            ), False
+        # A "processing" record no live job owns and that stopped checkpointing
+        # was abandoned (e.g. by a restart) and is resumed below instead
+        if previous is not None and previous.status == "processing" and (
+            jobs.get_job(previous.upload_id) is not None or not upload_is_stale(previous)
+        ):
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    "success": True,
+                    "message": "File is already being processed",
+                    "data": {"upload_id": previous.upload_id, "status": "processing"}
+                }
+            ), False
+
+        if background:
+            upload_id = await run_in_threadpool(
+                _enqueue_upload, file_obj, file_name, db, session_factory, keep,
+                csv_options, content_hash, previous, spooled_path
             )
+            logger.info(f"Queued file {file_name} as upload {upload_id}")
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    "success": True,
+                    "message": "File accepted for processing",
+                    "data": {"upload_id": upload_id, "status": "processing"}
+                }
+            ), True
 
-        # Process CSV
-        result = process_csv_upload(df, file_name, db) 
+        # Process CSV; parsing is blocking, so keep it off the event loop
+        result = await run_in_threadpool(
+            _ingest_upload, file_obj, file_name, db, keep, csv_options, content_hash, previous
+        )
         logger.info(f"Uploaded file {file_name} with {result['successful_rows']} successful rows, {result['failed_rows']} failed rows")
 
         return {
             "success": True,
             "message": "File processed successfully",
             "data": result
-        }
+        }, False
 
     except pd.errors.ParserError as e:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"success": False, "message": f"Malformed CSV: {e}"}
-        )
+        ), False
+    except HTTPException as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"success": False, "message": e.detail}
+        ), False
     except Exception as e:
         logger.error(f"---Unexpected error while processing file: {str(e)}")
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"success": False, "message": "An unexpected error occurred while processing the file."}
-        )
+        ), False
 
 
 @router.get("/history/", response_model=list[UploadHistoryResponse])
 async def get_upload_history(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Get history of file uploads.
+    Get history of file uploads, newest first.
+    When a page is full, the X-Next-Cursor response header holds the cursor
+    for the next page. skip/limit paging still works without it.
     """
-    history = db.query(models.UploadHistory).order_by(
-        models.UploadHistory.uploaded_at.desc()
-    ).offset(skip).limit(limit).all()
+    try:
+        history = _paginate_history(db.query(models.UploadHistory), cursor, skip, limit, response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return history
\ No newline at end of file
+    return history
+
+
+@router.get("/history/summary/", response_model=list[UploadHistorySummaryResponse])
+async def get_upload_history_summary(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get history of file uploads without the details JSON.
+    Only scalar columns are selected, so details is never fetched or decoded;
+    load it per upload from GET /api/v1/uploads/{upload_id}/.
+    Paging works as in /history/.
+    """
+    query = db.query(
+        models.UploadHistory.id,
+        models.UploadHistory.upload_id,
+        models.UploadHistory.filename,
+        models.UploadHistory.uploaded_at,
+        models.UploadHistory.rows_processed,
+        models.UploadHistory.status,
+    )
+    try:
+        history = _paginate_history(query, cursor, skip, limit, response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return history
+
+
+def _paginate_history(query, cursor: Optional[str], skip: int, limit: int, response: Response):
+    """
+    Keyset pagination on (uploaded_at, id) so deep pages cost the same as the first.
+    """
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            uploaded_at = datetime.fromisoformat(values["uploaded_at"])
+            last_id = int(values["id"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        query = query.filter(
+            tuple_(models.UploadHistory.uploaded_at, models.UploadHistory.id) < tuple_(uploaded_at, last_id)
+        )
+
+    rows = query.order_by(
+        models.UploadHistory.uploaded_at.desc(), models.UploadHistory.id.desc()
+    ).offset(skip).limit(limit).all()
+
+    if rows and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            {"uploaded_at": rows[-1].uploaded_at.isoformat(), "id": rows[-1].id}
+        )
+    return rows
+
+
+@router.get("/{upload_id}/", response_model=UploadStatusResponse)
+async def get_upload_status(upload_id: str, db: Session = Depends(get_db)):
+    """
+    Get the status and progress of a single upload.
+    """
+    upload = db.query(models.UploadHistory).filter_by(upload_id=upload_id).first()
+    if upload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found.")
+
+    return {
+        "upload_id": upload.upload_id,
+        "filename": upload.filename,
+        "uploaded_at": upload.uploaded_at,
+        "status": upload.status,
+        "rows_processed": upload.rows_processed,
+        "progress": (upload.details or {}).get("progress", {}),
+        "details": upload.details,
+    }
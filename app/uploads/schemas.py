@@ -20,4 +20,30 @@ class UploadHistoryResponse(BaseModel):
     # user_ip: Optional[str] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UploadHistorySummaryResponse(BaseModel):
+    id: int
+    upload_id: str
+    filename: str
+    uploaded_at: datetime
+    rows_processed: int
+    status: str
+
+    class Config:
+        from_attributes = True
+
+
+class UploadStatusResponse(BaseModel):
+    upload_id: str
+    filename: str
+    uploaded_at: datetime
+    status: str
+    rows_processed: int
+    progress: dict
+    details: Optional[dict] = None
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
@@ -1,7 +1,20 @@
 from operator import index
+import io
+import os
+import time
+import threading
 import pandas as pd
+from collections import OrderedDict
+from sqlalchemy import insert, select, tuple_, Boolean, Integer, Float, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from . import models
+from app.core import metrics
+from app.core.metrics import StageTimer
+from .validators import validate_transaction_rows
+from .partitions import ensure_partitions_for
+from .enums import known_enum_labels
+from app.transactions.rollups import update_rollups
 from datetime import datetime
 from fastapi import status, HTTPException
 import logging
@@ -10,139 +23,808 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def process_csv_upload(df: pd.DataFrame, file_name: str, db: Session):
+# Number of row-level errors kept in UploadHistory.details
+MAX_STORED_ERRORS = 10
+
+# Load chunks with COPY FROM STDIN when running on PostgreSQL
+PG_COPY_ENABLED = os.getenv("PG_COPY_ENABLED", "true").lower() == "true"
+
+# Which copy of a transaction_id repeated inside one file is kept: "first" or "last"
+DUPLICATE_KEEP = os.getenv("CSV_DUPLICATE_KEEP", "first")
+if DUPLICATE_KEEP not in ("first", "last"):
+    raise ValueError(f"CSV_DUPLICATE_KEEP must be 'first' or 'last', not {DUPLICATE_KEEP!r}")
+
+# A "processing" upload that has not checkpointed for this many seconds, and
+# that no background job owns, is treated as abandoned and can be resumed
+UPLOAD_STALE_SECONDS = int(os.getenv("UPLOAD_STALE_SECONDS", "900"))
+
+# transaction_ids of an upload's earlier chunks remembered to spot in-file
+# duplicates (oldest evicted first); older repeats are left to ON CONFLICT
+# and counted as duplicate_rows. About 100 bytes per ID
+IN_FILE_DEDUP_WINDOW = int(os.getenv("IN_FILE_DEDUP_WINDOW", "100000"))
+
+# Dedup keys of committed transactions kept in memory (LRU); 0 disables the cache
+TRANSACTION_ID_CACHE_SIZE = int(os.getenv("TRANSACTION_ID_CACHE_SIZE", "250000"))
+
+_id_cache = OrderedDict()
+_id_cache_lock = threading.Lock()
+_id_cache_stats = {"hits": 0, "misses": 0, "stale": 0, "warmed": False}
+
+# Summary counts reported as csvup_ingest_rows_total outcomes
+ROW_OUTCOMES = {
+    "parsed": "total_rows",
+    "inserted": "successful_rows",
+    "duplicate": "duplicate_rows",
+    "in_file_duplicate": "in_file_duplicate_rows",
+    "failed": "failed_rows",
+}
+
+metrics.register("csvup_ingest_rows_total", "counter", "Rows read from uploads, by outcome.")
+metrics.register("csvup_ingest_invalid_rows_total", "counter", "Rows rejected by validation, by failed check.")
+metrics.register("csvup_ingest_stage_seconds", "histogram", "Seconds spent per ingest stage, per chunk.")
+metrics.register("csvup_ingest_chunk_seconds", "histogram", "Wall-clock seconds per ingested chunk.")
+metrics.register("csvup_ingest_batch_seconds", "histogram", "Seconds per insert statement, by method (insert or copy).")
+metrics.register("csvup_uploads_total", "counter", "Finished uploads, by status.")
+metrics.register("csvup_upload_seconds", "histogram", "Wall-clock seconds spent ingesting each upload.")
+metrics.register(
+    "csvup_upload_rows_per_second", "histogram", "Rows read per second, per finished upload.",
+    buckets=metrics.THROUGHPUT_BUCKETS,
+)
+
+
+def create_upload_record(file_name: str, db: Session, content_sha256: str = None) -> models.UploadHistory:
+    """
+    Creates and commits a "processing" UploadHistory row so progress can be
+    polled before the first chunk lands.
+    """
+    upload_record = models.UploadHistory(
+        filename=file_name,
+        uploaded_at=datetime.utcnow(),
+        rows_processed=0,
+        status="processing",
+        details=_summary_details(new_summary()),
+        content_sha256=content_sha256,
+    )
+    db.add(upload_record)
+    db.commit()
+    return upload_record
+
+
+def find_upload_by_hash(content_sha256: str, db: Session):
+    """
+    Returns the latest upload of identical content, or None.
+    """
+    return db.query(models.UploadHistory).filter_by(
+        content_sha256=content_sha256
+    ).order_by(models.UploadHistory.id.desc()).first()
+
+
+def reopen_upload(upload_record: models.UploadHistory, db: Session) -> models.UploadHistory:
+    """
+    Puts a failed or abandoned upload back to "processing" so it can be
+    resumed, with a fresh heartbeat.
+    """
+    upload_record.status = "processing"
+    upload_record.details = {**(upload_record.details or {}), "heartbeat": datetime.utcnow().isoformat()}
+    db.commit()
+    return upload_record
+
+
+def upload_is_stale(upload_record: models.UploadHistory) -> bool:
+    """
+    True when a "processing" upload has not checkpointed for
+    UPLOAD_STALE_SECONDS, e.g. because the process ingesting it died.
+    Records without a heartbeat count from uploaded_at.
+    """
+    heartbeat = (upload_record.details or {}).get("heartbeat")
+    last_seen = datetime.fromisoformat(heartbeat) if heartbeat else upload_record.uploaded_at
+    return (datetime.utcnow() - last_seen).total_seconds() > UPLOAD_STALE_SECONDS
+
+
+def resume_point(upload_record: models.UploadHistory) -> tuple[dict, int]:
+    """
+    Rebuilds the running counts saved by the last chunk checkpoint.
+    Returns (summary, rows to skip); a record without a checkpoint starts over.
     """
-    Reads a CSV file and bulk inserts/updates records in the database.
+    details = upload_record.details or {}
+    checkpoint = details.get("checkpoint")
+    if not checkpoint:
+        return new_summary(), 0
+
+    progress = details["progress"]
+    summary = {
+        "total_rows": progress["rows_parsed"],
+        "successful_rows": progress["inserted"],
+        "duplicate_rows": details["duplicates"],
+        "in_file_duplicate_rows": details["in_file_duplicates"],
+        "in_file_duplicate_ids": list(details["in_file_duplicate_ids"]),
+        "failed_rows": progress["failed"],
+        "invalid_rows": dict(details["invalid_rows"]),
+        "errors": list(details["errors"]),
+        "timings": dict(details.get("timings", {})),
+    }
+    return summary, checkpoint["rows"]
+
+
+def process_csv_upload(
+    chunks,
+    file_name: str,
+    db: Session,
+    keep: str = DUPLICATE_KEEP,
+    upload_record: models.UploadHistory = None,
+    summary: dict = None,
+    timer: StageTimer = None,
+):
+    """
+    Inserts transactions from a DataFrame, or an iterable of DataFrame chunks,
+    into the database. Each chunk is deduplicated, inserted and committed
+    before the next one is read.
+    keep picks which row wins when a transaction_id repeats within the file.
+    keep="last" is only honoured for uploads that fit in one chunk, as the
+    earlier copies of a longer file are committed before later ones are read;
+    a multi-chunk upload is rejected before any row is inserted.
+    Pass upload_record to fill in a row created by create_upload_record, and
+    summary (from resume_point) to continue a resumed upload's counts.
+    Pass the timer given to read_upload_chunks so read time is attributed.
     Returns summary info for response.
     """   
 
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+
+    if upload_record is None:
+        upload_record = create_upload_record(file_name, db)
+    timer = timer or StageTimer()
+    if keep == "last":
+        chunks = _single_chunk(chunks)
+
     try:
-        upload_record = models.UploadHistory(
-            filename=file_name,
-            uploaded_at=datetime.utcnow(),
-            rows_processed=0,
-            status="processing",
+        summary = summary or new_summary()
+        # Recent IDs, so repeats in later chunks count as in-file duplicates
+        seen_ids = OrderedDict()
+
+        for df in timed_chunks(chunks, timer):
+            part = new_summary()
+            inserted_keys = process_chunk(
+                df, db, part, keep, upload_id=upload_record.upload_id, timer=timer, seen_ids=seen_ids
+            )
+            merge_summary(summary, part)
+
+            # Commit per chunk so the session never holds more than one chunk,
+            # and so pollers see progress. Every row read so far is committed,
+            # so the row count is where a retry of this file resumes.
+            with timer.stage("commit"):
+                checkpoint_upload(upload_record, summary, db, resume_rows=summary["total_rows"])
+            remember_transaction_ids(inserted_keys)
+
+            # Stored timings trail by one chunk, as the commit above writes them
+            timer.flush_into(part["timings"], summary["timings"])
+            record_chunk_metrics(part)
+
+        timer.flush_into(summary["timings"])
+        return finish_upload(upload_record, summary, db)
+
+    except pd.errors.ParserError as e:
+        # Let callers report malformed input as such
+        db.rollback()
+        logger.error(f"---Malformed CSV: {str(e)}")
+        mark_upload_failed(upload_record, db)
+        raise
+
+    except HTTPException as e:
+        db.rollback()
+        logger.error(f"---Upload rejected: {e.detail}")
+        mark_upload_failed(upload_record, db)
+        raise
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"---Error while parsing CSV: {str(e)}")
+        mark_upload_failed(upload_record, db)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV processing failed."
         )
-        db.add(upload_record)
-        db.flush()  
-       
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", format="%Y-%m-%d %H:%M:%S")
-        days_map = {"Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3, 
-                  "Friday": 4, "Saturday": 5, "Sunday": 6}
-        df["transaction_day_of_week"] = df["transaction_day_of_week"].map(days_map)
-
-        # checking for duplicates in BATCHES of 1000
-        existing_txn_id = set()
-        transaction_ids = df["transaction_id"].tolist()
-
-        batch_size = 1000
-        for i in range(0, len(transaction_ids), batch_size):
-            batch_ids = transaction_ids[i:i + batch_size]
-            batch_existing = {id[0] for id in db.query(models.Transaction.transaction_id)
-                            .filter(models.Transaction.transaction_id.in_(batch_ids))
-                            .all()}
-            existing_txn_id.update(batch_existing)
-                
-        new_rows = df[~df["transaction_id"].isin(existing_txn_id)]
-        successful_rows = 0
-        # failed_rows = 0
-        duplicate_rows = len(df) - len(new_rows)
-        transactions = []
-        errors = []
-
-        for index, row in new_rows.itertuples():
-            try:
-                transactions.append(
-                    models.Transaction(
-                        transaction_id=row.transaction_id,
-                        timestamp=row.timestamp.to_pydatetime() if not pd.isnull(row.timestamp) else None,
-                        user_id=row.user_id,
-
-                        account_age_days=row.account_age_days,
-                        customer_tier=row.customer_tier,
-                        kyc_level=row.kyc_level,
-                        has_multiple_accounts=bool(row.has_multiple_accounts),
-                        linked_card_count=row.linked_card_count,
-                        transaction_amount=row.transaction_amount,
-                        transaction_currency=row.transaction_currency,
-                        transaction_type=row.transaction_type,
-                        merchant_category=row.merchant_category,
-                        merchant_id=row.merchant_id,
-                        merchant_risk_score=row.merchant_risk_score,
-                        transaction_hour=row.transaction_hour,
-                        transaction_day_of_week=row.transaction_day_of_week,
-                        is_weekend_transaction=bool(row.is_weekend_transaction),
-                        is_nighttime_transaction=bool(row.is_nighttime_transaction),
-                        device_id=row.device_id,
-                        device_os=row.device_os,
-                        device_type=row.device_type,
-                        is_vpn_used=bool(row.is_vpn_used),
-                        is_proxy_used=bool(row.is_proxy_used),
-                        ip_address=row.ip_address,
-                        has_multiple_devices=bool(row.has_multiple_devices),
-                        is_blacklisted_card=bool(row.is_blacklisted_card),
-                        is_blacklisted_device=bool(row.is_blacklisted_device),
-                        is_high_risk_country=bool(row.is_high_risk_country),
-                        distance_from_last_transaction=row.distance_from_last_transaction,
-                        has_chargeback_history=bool(row.has_chargeback_history),
-                        previous_fraudulent_activity=bool(row.previous_fraudulent_activity),
-                        account_fraud_reported=bool(row.account_fraud_reported),
-                        is_high_risk_behavior=bool(row.is_high_risk_behavior),
-                        label=row.label
-                    )
-                )
-                successful_rows += 1
-            
-            except Exception as e:
-                # failed_rows += 1
-                errors.append({
+
+
+def _single_chunk(chunks):
+    """
+    Yields the only chunk of an upload, raising before it is processed if a
+    second chunk follows.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return
+    if next(chunks, None) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="keep=last needs the file in one chunk; use keep=first or raise CSV_CHUNK_SIZE.",
+        )
+    yield first
+
+
+def new_summary() -> dict:
+    """
+    Running counts for one upload, filled in by process_chunk.
+    """
+    return {
+        "total_rows": 0,
+        "successful_rows": 0,
+        "duplicate_rows": 0,
+        "in_file_duplicate_rows": 0,
+        "in_file_duplicate_ids": [],
+        "failed_rows": 0,
+        "invalid_rows": {},
+        "errors": [],
+        "timings": {},  # seconds per stage, filled by StageTimer.flush_into
+    }
+
+
+def merge_summary(total: dict, part: dict):
+    """
+    Adds the counts of part into total, keeping the stored samples capped.
+    """
+    for key in ("total_rows", "successful_rows", "duplicate_rows", "in_file_duplicate_rows", "failed_rows"):
+        total[key] += part[key]
+    for key in ("errors", "in_file_duplicate_ids"):
+        total[key].extend(part[key][:MAX_STORED_ERRORS - len(total[key])])
+    for reason, count in part["invalid_rows"].items():
+        total["invalid_rows"][reason] = total["invalid_rows"].get(reason, 0) + count
+    for stage, seconds in part["timings"].items():
+        total["timings"][stage] = total["timings"].get(stage, 0.0) + seconds
+
+
+def timed_chunks(chunks, timer: StageTimer):
+    """
+    Yields from chunks, booking the time spent producing each one to the
+    "parse" stage (less any read or decode time nested in it).
+    """
+    chunks = iter(chunks)
+    while True:
+        with timer.stage("parse"):
+            df = next(chunks, None)
+        if df is None:
+            return
+        yield df
+
+
+def record_chunk_metrics(part: dict):
+    """
+    Reports the counts and stage timings of one chunk (or one parallel
+    worker's range) to the Prometheus registry.
+    """
+    for outcome, key in ROW_OUTCOMES.items():
+        if part[key]:
+            metrics.inc("csvup_ingest_rows_total", part[key], outcome=outcome)
+    for reason, count in part["invalid_rows"].items():
+        metrics.inc("csvup_ingest_invalid_rows_total", count, check=reason)
+    for stage, seconds in part["timings"].items():
+        if stage == "total":
+            metrics.observe("csvup_ingest_chunk_seconds", seconds)
+        else:
+            metrics.observe("csvup_ingest_stage_seconds", seconds, stage=stage)
+
+
+def checkpoint_upload(upload_record: models.UploadHistory, summary: dict, db: Session, resume_rows: int = None):
+    """
+    Commits the current chunk together with the running counts.
+    resume_rows, when the chunks are a prefix of the file, is recorded as the
+    number of data rows a retry can skip.
+    """
+    upload_record.rows_processed = summary["successful_rows"]
+    upload_record.details = _summary_details(summary)
+    if resume_rows is not None:
+        upload_record.details["checkpoint"] = {"rows": resume_rows}
+    db.commit()
+
+
+def finish_upload(upload_record: models.UploadHistory, summary: dict, db: Session) -> dict:
+    """
+    Sets the final status and counts on the upload record.
+    Returns summary info for response.
+    """
+    upload_record.rows_processed = summary["successful_rows"]
+    upload_record.status = "success" if not summary["failed_rows"] else "partial"
+    upload_record.details = _summary_details(summary)
+    
+    db.commit()
+
+    metrics.inc("csvup_uploads_total", status=upload_record.status)
+    elapsed = summary["timings"].get("total")
+    if elapsed:
+        metrics.observe("csvup_upload_seconds", elapsed)
+        metrics.observe("csvup_upload_rows_per_second", summary["total_rows"] / elapsed)
+
+    return upload_result(upload_record)
+
+
+def upload_result(upload_record: models.UploadHistory) -> dict:
+    """
+    Summary info for response, read back from the stored details.
+    """
+    details = upload_record.details or {}
+    progress = details.get("progress", {})
+    return {
+        "filename": upload_record.filename,
+        "total_rows": progress.get("rows_parsed", 0),
+        "successful_rows": progress.get("inserted", 0),
+        "failed_rows": progress.get("failed", 0),
+        "duplicate_rows": details.get("duplicates", 0),
+        "in_file_duplicate_rows": details.get("in_file_duplicates", 0),
+        "upload_id": upload_record.upload_id
+    }
+
+
+def _summary_details(summary: dict) -> dict:
+    """
+    Shapes running counts into the UploadHistory.details JSON.
+    """
+    return {
+        "errors": summary["errors"], # First MAX_STORED_ERRORS errors
+        "duplicates": summary["duplicate_rows"],
+        "in_file_duplicates": summary["in_file_duplicate_rows"],
+        "in_file_duplicate_ids": summary["in_file_duplicate_ids"], # First MAX_STORED_ERRORS IDs
+        "invalid_rows": summary["invalid_rows"], # Rows rejected per validation check
+        "progress": {
+            "rows_parsed": summary["total_rows"],
+            "inserted": summary["successful_rows"],
+            "duplicates": summary["duplicate_rows"] + summary["in_file_duplicate_rows"],
+            "failed": summary["failed_rows"],
+        },
+        # Seconds per stage and in total ("total"); the stages can add up to
+        # more than total when parallel workers overlap
+        "timings": {stage: round(seconds, 6) for stage, seconds in summary["timings"].items()},
+        "rows_per_second": (
+            round(summary["total_rows"] / summary["timings"]["total"], 1)
+            if summary["timings"].get("total") else None
+        ),
+        "heartbeat": datetime.utcnow().isoformat(),  # Last time the record was written; see upload_is_stale
+    }
+
+
+def mark_upload_failed(upload_record: models.UploadHistory, db: Session):
+    """
+    Flags an upload as failed; chunks committed before the error are kept.
+    """
+    metrics.inc("csvup_uploads_total", status="failed")
+    try:
+        upload_record.status = "failed"
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"---Could not mark upload as failed: {str(e)}")
+
+
+def _record_error(summary: dict, error: dict):
+    """
+    Counts a failed row, keeping only the first MAX_STORED_ERRORS samples.
+    """
+    summary["failed_rows"] += 1
+    if len(summary["errors"]) < MAX_STORED_ERRORS:
+        summary["errors"].append(error)
+
+
+def _record_invalid_rows(transaction_ids: pd.Series, failures: pd.DataFrame, summary: dict):
+    """
+    Counts rows rejected by validate_transaction_rows, per check, and stores
+    the reasons for the first MAX_STORED_ERRORS of them.
+    """
+    for reason, count in failures.sum().items():
+        if count:
+            summary["invalid_rows"][reason] = summary["invalid_rows"].get(reason, 0) + int(count)
+
+    room = MAX_STORED_ERRORS - len(summary["errors"])
+    summary["failed_rows"] += len(transaction_ids)
+    for index, row in failures.iloc[:max(room, 0)].iterrows():
+        summary["errors"].append({
+            "row": int(index) + 1,  # 1-based index for readability
+            "error": "; ".join(reason for reason, failed in row.items() if failed),
+            "transaction_id": transaction_ids[index]
+        })
+
+
+def process_chunk(
+    df: pd.DataFrame,
+    db: Session,
+    summary: dict,
+    keep: str = DUPLICATE_KEEP,
+    upload_id: str = None,
+    timer: StageTimer = None,
+    seen_ids: OrderedDict = None,
+    use_id_cache: bool = True,
+) -> list:
+    """
+    Inserts a single chunk, skipping existing transaction IDs, and
+    accumulates counts into summary. Inserted rows are tagged with upload_id.
+    seen_ids holds the last IN_FILE_DEDUP_WINDOW IDs of the upload's earlier
+    chunks; repeats of them are dropped as in-file duplicates and the
+    chunk's IDs are added to it.
+    use_id_cache=False skips the transaction ID cache, e.g. in a worker
+    process whose cache would be warmed only to be thrown away.
+    Time spent is booked to timer's dedup, validate, materialize, flush and
+    rollups stages.
+    Returns the dedup keys of the inserted rows; pass them to
+    remember_transaction_ids once the chunk is committed.
+    """
+    timer = timer or StageTimer()
+    summary["total_rows"] += len(df)
+
+    # Drop IDs repeated within the file before they can collide in a batch
+    with timer.stage("dedup"):
+        repeated = df.duplicated(subset="transaction_id", keep=keep)
+        if seen_ids is not None:
+            repeated |= df["transaction_id"].isin(seen_ids.keys())
+            _remember_seen_ids(seen_ids, df.loc[~repeated, "transaction_id"].dropna())
+        if repeated.any():
+            repeated_ids = df.loc[repeated, "transaction_id"]
+            summary["in_file_duplicate_rows"] += len(repeated_ids)
+            room = MAX_STORED_ERRORS - len(summary["in_file_duplicate_ids"])
+            summary["in_file_duplicate_ids"].extend(str(i) for i in repeated_ids.iloc[:room])
+            df = df[~repeated].copy()
+
+    # Split off rows with impossible values so they cannot fail a whole batch
+    with timer.stage("validate"):
+        engine = db.get_bind().engine
+        df, failures = validate_transaction_rows(
+            df, check_ip=engine.dialect.name == "postgresql", enum_labels=known_enum_labels(engine)
+        )
+        invalid = failures.any(axis=1)
+        if invalid.any():
+            _record_invalid_rows(df.loc[invalid, "transaction_id"], failures[invalid], summary)
+            df = df[~invalid]
+
+        # Duplicates are skipped by the database (ON CONFLICT DO NOTHING)
+        try:
+            frame = _cast_columns(df)
+        except Exception as e:
+            for index, transaction_id in df["transaction_id"].items():
+                _record_error(summary, {
                     "row": index + 1,  # 1-based index for readability
                     "error": str(e),
-                    "transaction_id": getattr(row, 'transaction_id', 'unknown')
+                    "transaction_id": transaction_id
                 })
-                logger.error(f"Error processing row {index + 1}: {e}")
+            logger.error(f"Error converting rows {df.index.min() + 1}-{df.index.max() + 1}: {e}")
+            return []
+
+    if frame.empty:
+        return []
+
+    with timer.stage("flush"):
+        # Partitions are created on their own autocommit connection. This must
+        # happen before the session first reads transactions in this chunk (the
+        # cache warm-up below): the session would hold its lock until commit
+        # and the partition DDL would wait on it.
+        ensure_partitions_for(frame["timestamp"], engine)
 
-        # BATCH insert in 1000 txn chunks
-        if transactions:
+    # Rows the cache nominates, and the database confirms, are not inserted
+    with timer.stage("dedup"):
+        cached = cached_transaction_ids(_dedup_keys(frame), db) if use_id_cache else []
+        if any(cached):
+            summary["duplicate_rows"] += sum(cached)
+            frame = frame[[not hit for hit in cached]]
+
+    if frame.empty:
+        return []
+
+    with timer.stage("flush"):
+        if upload_id is not None:
+            frame["upload_id"] = pd.Series(upload_id, index=frame.index, dtype="string")
+
+        copied = False
+        if _use_copy(db):
+            try:
+                started = time.perf_counter()
+                with db.begin_nested():
+                    inserted_ids = _copy_transactions(frame, db)
+                metrics.observe("csvup_ingest_batch_seconds", time.perf_counter() - started, method="copy")
+            except Exception as copy_error:
+                # Fall back to bisected executemany batches to isolate the bad rows
+                logger.error(f"Error copying rows {frame.index.min() + 1}-{frame.index.max() + 1}: {copy_error}")
+            else:
+                summary["duplicate_rows"] += len(frame) - len(inserted_ids)
+                summary["successful_rows"] += len(inserted_ids)
+                copied = True
+
+    if not copied:
+        with timer.stage("materialize"):
+            records = _materialize_rows(frame)
+            rows = [int(index) + 1 for index in frame.index]  # 1-based index for readability
+
+        # BATCH insert in 1000 txn chunks via Core executemany, no ORM objects
+        with timer.stage("flush"):
+            insert_stmt = _insert_ignore_duplicates(db)
             batch_size = 1000
-            for i in range(0, len(transactions), batch_size):
-                batch = transactions[i:i + batch_size]
-                try:
-                    db.bulk_save_objects(batch)
-                    db.flush()  # Flush after each batch-catch DB errors early & manage memory
-                except Exception as batch_error:
-                    logger.error(f"Error inserting batch {i//batch_size + 1}: {batch_error}")
-                    for j, transaction in enumerate(batch):
-                        errors.append({
-                            "row": "batch_error",
-                            "error": str(batch_error),
-                            "transaction_id": transaction.transaction_id
-                        })
-                    successful_rows -= len(batch)  # Adjust successful count
-
-        # Update upload history record
-        upload_record.rows_processed = successful_rows
-        upload_record.status = "success" if not errors else "partial"
-        upload_record.details = {
-            "errors": errors[:10], # Store first 10 errors
-            "duplicates": duplicate_rows 
-        }  
-        
-        db.commit()
+            inserted_ids = []
+            for i in range(0, len(records), batch_size):
+                inserted_ids += _insert_batch(db, insert_stmt, records[i:i + batch_size], rows[i:i + batch_size], summary)
+
+    # Rollups count only rows that were actually inserted, in the chunk's transaction
+    with timer.stage("rollups"):
+        update_rollups(frame, inserted_ids, db)
+    return _inserted_keys(frame, inserted_ids)
+
+
+def _remember_seen_ids(seen_ids: OrderedDict, transaction_ids: pd.Series):
+    """
+    Adds a chunk's IDs to seen_ids, evicting the oldest beyond
+    IN_FILE_DEDUP_WINDOW so memory stays flat however long the upload is.
+    """
+    if IN_FILE_DEDUP_WINDOW <= 0:
+        return
+    seen_ids.update(dict.fromkeys(transaction_ids.iloc[-IN_FILE_DEDUP_WINDOW:].tolist()))
+    while len(seen_ids) > IN_FILE_DEDUP_WINDOW:
+        seen_ids.popitem(last=False)
+
+
+def _dedup_keys(frame: pd.DataFrame) -> list:
+    """
+    The values of TRANSACTION_CONFLICT_COLUMNS per row: the ID, or
+    (ID, timestamp) on a partitioned table.
+    """
+    if len(models.TRANSACTION_CONFLICT_COLUMNS) == 1:
+        return frame["transaction_id"].tolist()
+    return list(zip(*(frame[column].tolist() for column in models.TRANSACTION_CONFLICT_COLUMNS)))
+
+
+def _inserted_keys(frame: pd.DataFrame, inserted_ids: list) -> list:
+    return _dedup_keys(frame[frame["transaction_id"].isin(inserted_ids)])
+
+
+def cached_transaction_ids(keys: list, db: Session) -> list[bool]:
+    """
+    Looks up dedup keys in the in-process LRU cache of committed
+    transactions, which is warmed from the newest stored transactions on
+    first use. The cache only nominates rows: hits are confirmed with one
+    indexed SELECT per 1000 keys before their rows are skipped, and a key
+    the database no longer holds is evicted and its row inserted as usual.
+    Returns one bool per key.
+    """
+    if TRANSACTION_ID_CACHE_SIZE <= 0:
+        return [False] * len(keys)
+    if not _id_cache_stats["warmed"]:
+        warm_transaction_id_cache(db)
+
+    with _id_cache_lock:
+        candidates = [key for key in keys if key in _id_cache]
+    stored = _stored_keys(candidates, db) if candidates else set()
+
+    with _id_cache_lock:
+        for key in candidates:
+            if key in stored:
+                _id_cache.move_to_end(key)
+            else:
+                _id_cache.pop(key, None)
+        hits = [key in stored for key in keys]
+        _id_cache_stats["hits"] += sum(hits)
+        _id_cache_stats["misses"] += len(hits) - sum(hits)
+        _id_cache_stats["stale"] += len(candidates) - sum(hits)
+    return hits
+
+
+def _stored_keys(keys: list, db: Session) -> set:
+    """
+    The subset of dedup keys present in transactions.
+    """
+    columns = [models.Transaction.__table__.c[name] for name in models.TRANSACTION_CONFLICT_COLUMNS]
+    key = columns[0] if len(columns) == 1 else tuple_(*columns)
+    stored = set()
+    for i in range(0, len(keys), 1000):
+        rows = db.execute(select(*columns).where(key.in_(keys[i:i + 1000]))).all()
+        stored.update(row[0] if len(columns) == 1 else tuple(row) for row in rows)
+    return stored
+
+
+def remember_transaction_ids(keys: list):
+    """
+    Adds the dedup keys of committed rows to the cache, evicting the least
+    recently seen keys beyond TRANSACTION_ID_CACHE_SIZE. Call this after
+    the commit, so the cache never nominates rows that were rolled back.
+    """
+    if TRANSACTION_ID_CACHE_SIZE <= 0 or not keys:
+        return
+    with _id_cache_lock:
+        for key in keys:
+            _id_cache[key] = None
+            _id_cache.move_to_end(key)
+        while len(_id_cache) > TRANSACTION_ID_CACHE_SIZE:
+            _id_cache.popitem(last=False)
+
+
+def warm_transaction_id_cache(db: Session):
+    """
+    Fills the cache with the keys of the newest stored transactions, so
+    the first upload after a restart already skips yesterday's rows.
+    Reads in the ingest session, so process_chunk creates partitions first.
+    """
+    columns = [models.Transaction.__table__.c[name] for name in models.TRANSACTION_CONFLICT_COLUMNS]
+    try:
+        with db.begin_nested():
+            rows = db.execute(
+                select(*columns)
+                .where(models.Transaction.timestamp.isnot(None))
+                .order_by(models.Transaction.timestamp.desc())
+                .limit(TRANSACTION_ID_CACHE_SIZE)
+            ).all()
+    except Exception as e:
+        logger.error(f"---Could not warm the transaction ID cache: {str(e)}")
+        rows = []
+
+    # Oldest first, so the newest rows are the last to be evicted
+    keys = [row[0] if len(columns) == 1 else tuple(row) for row in reversed(rows)]
+    with _id_cache_lock:
+        _id_cache_stats["warmed"] = True
+    remember_transaction_ids(keys)
 
+
+def clear_transaction_id_cache():
+    """
+    Empties the cache and resets its counters; the next lookup warms it
+    again. Needed whenever stored transactions are deleted or rolled back.
+    """
+    with _id_cache_lock:
+        _id_cache.clear()
+        _id_cache_stats.update(hits=0, misses=0, stale=0, warmed=False)
+
+
+def get_transaction_id_cache_metrics() -> dict:
+    """
+    Snapshot of the cache's size and its hits and misses since startup.
+    A hit is a row confirmed as stored and not inserted; stale counts cached
+    keys the database no longer held.
+    """
+    with _id_cache_lock:
         return {
-            "filename": file_name,
-            "total_rows": len(df),
-            "successful_rows": successful_rows,
-            "failed_rows": len(errors),
-            "duplicate_rows": duplicate_rows,
-            "upload_id": upload_record.upload_id
+            "size": len(_id_cache),
+            "capacity": TRANSACTION_ID_CACHE_SIZE,
+            "hits": _id_cache_stats["hits"],
+            "misses": _id_cache_stats["misses"],
+            "stale": _id_cache_stats["stale"],
         }
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"---Error while parsing CSV: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="CSV processing failed."
+
+def _insert_batch(db: Session, insert_stmt, batch: list[dict], rows: list[int], summary: dict) -> list[str]:
+    """
+    Inserts a batch under a SAVEPOINT so a failure leaves the session usable.
+    A failed batch is split in half and each half retried, which isolates a
+    single bad row in about log2(len(batch)) extra round-trips.
+    Returns the IDs that were actually inserted.
+    """
+    try:
+        started = time.perf_counter()
+        with db.begin_nested():
+            inserted_ids = db.execute(insert_stmt, batch).scalars().all()
+        metrics.observe("csvup_ingest_batch_seconds", time.perf_counter() - started, method="insert")
+    except Exception as batch_error:
+        if len(batch) == 1:
+            logger.error(f"Error inserting row {rows[0]}: {batch_error}")
+            _record_error(summary, {
+                "row": rows[0],
+                "error": str(batch_error),
+                "transaction_id": batch[0]["transaction_id"]
+            })
+            return []
+        middle = len(batch) // 2
+        return (
+            _insert_batch(db, insert_stmt, batch[:middle], rows[:middle], summary)
+            + _insert_batch(db, insert_stmt, batch[middle:], rows[middle:], summary)
+        )
+
+    summary["duplicate_rows"] += len(batch) - len(inserted_ids)
+    summary["successful_rows"] += len(inserted_ids)
+    return inserted_ids
+
+
+def _insert_ignore_duplicates(db: Session):
+    """
+    Builds the dialect's insert-or-skip statement for transactions.
+    RETURNING yields only the IDs that were actually inserted.
+    """
+    transactions_table = models.Transaction.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        stmt = postgresql.insert(transactions_table).on_conflict_do_nothing(
+            index_elements=models.TRANSACTION_CONFLICT_COLUMNS
+        )
+    elif dialect == "sqlite":
+        # Only the transaction_id conflict is skipped; NOT NULL and other
+        # violations still fail the batch and are isolated by bisection
+        stmt = sqlite.insert(transactions_table).on_conflict_do_nothing(
+            index_elements=models.TRANSACTION_CONFLICT_COLUMNS
+        )
+    else:
+        stmt = insert(transactions_table)
+
+    return stmt.returning(transactions_table.c.transaction_id)
+
+
+def _cast_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Casts every column to its models.Transaction type in one vectorized pass.
+    Columns that are not on the model are dropped.
+    """
+    columns = {}
+    for column in models.Transaction.__table__.columns:
+        if column.name not in df.columns:
+            continue
+        series = df[column.name]
+
+        if isinstance(column.type, Boolean):
+            series = pd.to_numeric(series, errors="coerce").astype("boolean")
+        elif isinstance(column.type, Integer):
+            series = pd.to_numeric(series, errors="coerce")
+            if (series.dropna() % 1 == 0).all():
+                series = series.astype("Int64")
+        elif isinstance(column.type, Float):
+            series = pd.to_numeric(series, errors="coerce").astype("float64")
+        elif isinstance(column.type, DateTime):
+            series = pd.to_datetime(series, errors="coerce")
+        else:
+            series = series.astype("string")
+
+        columns[column.name] = series
+
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _materialize_rows(frame: pd.DataFrame) -> list[dict]:
+    """
+    Returns plain parameter dicts ready for an executemany insert from a
+    frame already cast by _cast_columns. Missing values become None.
+    Rows are zipped from per-column lists, which is much cheaper than
+    DataFrame.to_dict("records").
+    """
+    columns = {}
+    for name in frame.columns:
+        series = frame[name]
+        if isinstance(models.Transaction.__table__.c[name].type, DateTime):
+            columns[name] = [None if pd.isnull(value) else value for value in series.array.to_pydatetime()]
+        else:
+            columns[name] = series.astype(object).where(series.notna(), None).tolist()
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def _use_copy(db: Session) -> bool:
+    """
+    COPY is only available on PostgreSQL; every other dialect uses executemany.
+    """
+    return PG_COPY_ENABLED and db.get_bind().dialect.name == "postgresql"
+
+
+def _copy_transactions(frame: pd.DataFrame, db: Session) -> list[str]:
+    """
+    Streams a cast chunk into a temp staging table with COPY FROM STDIN, then
+    merges it into transactions, skipping IDs that already exist.
+    Missing values are staged as \\N so an empty string stays an empty
+    string, as it does on the executemany path.
+    Returns the IDs that were actually inserted.
+    """
+    column_list = ", ".join(frame.columns)
+
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, na_rep="\\N", date_format="%Y-%m-%d %H:%M:%S")
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS transactions_staging "
+            "(LIKE transactions INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
         )
+        cursor.copy_expert(
+            f"COPY transactions_staging ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+        cursor.execute(
+            f"INSERT INTO transactions ({column_list}) "
+            f"SELECT {column_list} FROM transactions_staging "
+            f"ON CONFLICT ({', '.join(models.TRANSACTION_CONFLICT_COLUMNS)}) DO NOTHING RETURNING transaction_id"
+        )
+        inserted_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("TRUNCATE transactions_staging")
+    finally:
+        cursor.close()
+
+    return inserted_ids
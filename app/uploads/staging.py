@@ -0,0 +1,165 @@
+import os
+import json
+import shutil
+import tempfile
+import logging
+from uuid import uuid4, UUID
+from datetime import datetime, timedelta
+from fastapi.concurrency import run_in_threadpool
+from app.uploads import jobs
+
+
+logger = logging.getLogger(__name__)
+
+
+# Where parts of chunked upload sessions are kept until the upload completes.
+# Must be shared by every worker process serving the API.
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR") or os.path.join(tempfile.gettempdir(), "csvup-staging")
+
+# Sessions not completed within this many seconds are swept with their parts
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Highest part number accepted in a session
+MAX_UPLOAD_PARTS = int(os.getenv("MAX_UPLOAD_PARTS", "10000"))
+
+
+def create_session(file_name: str) -> dict:
+    """
+    Starts a chunked upload session backed by a staging directory.
+    Parts are written by write_part and joined by assemble.
+    """
+    session_id = str(uuid4())
+    path = os.path.join(UPLOAD_STAGING_DIR, session_id)
+    os.makedirs(path)
+    meta = {"session_id": session_id, "filename": file_name, "created_at": datetime.utcnow().isoformat()}
+    with open(os.path.join(path, "meta.json"), "w") as meta_file:
+        json.dump(meta, meta_file)
+    return meta
+
+
+def get_session(session_id: str) -> dict:
+    """
+    Returns the session's metadata and the parts received so far.
+    Raises LookupError for an unknown session.
+    """
+    path = _session_path(session_id)
+    with open(os.path.join(path, "meta.json")) as meta_file:
+        meta = json.load(meta_file)
+    meta["parts"] = [
+        {"part_number": number, "size": os.path.getsize(os.path.join(path, _part_name(number)))}
+        for number in _part_numbers(path)
+    ]
+    return meta
+
+
+async def write_part(session_id: str, part_number: int, chunks) -> dict:
+    """
+    Streams a part body (an async iterator of bytes) to its own file.
+    The part only becomes visible once fully written, so a retried or
+    concurrent PUT of the same part never leaves a torn file.
+    """
+    if not 1 <= part_number <= MAX_UPLOAD_PARTS:
+        raise ValueError(f"Part number must be between 1 and {MAX_UPLOAD_PARTS}.")
+    path = _session_path(session_id)
+
+    tmp_path = os.path.join(path, f"{_part_name(part_number)}.{uuid4().hex}.tmp")
+    size = 0
+    part_file = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+        async for chunk in chunks:
+            await run_in_threadpool(part_file.write, chunk)
+            size += len(chunk)
+        await run_in_threadpool(part_file.close)
+        os.replace(tmp_path, os.path.join(path, _part_name(part_number)))
+    except BaseException:
+        part_file.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {"part_number": part_number, "size": size}
+
+
+def assemble(session_id: str) -> tuple[str, str]:
+    """
+    Concatenates parts 1..N into one temp file and removes the session.
+    Raises ValueError when no parts arrived or a part number is missing.
+    Returns (path of the assembled file, original file name); the caller
+    owns the file.
+    """
+    path = _session_path(session_id)
+    with open(os.path.join(path, "meta.json")) as meta_file:
+        file_name = json.load(meta_file)["filename"]
+
+    numbers = _part_numbers(path)
+    if not numbers:
+        raise ValueError("No parts were uploaded.")
+    missing = sorted(set(range(1, numbers[-1] + 1)) - set(numbers))
+    if missing:
+        raise ValueError(f"Missing parts: {missing[:10]}")
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv", dir=jobs.UPLOAD_TMP_DIR) as assembled:
+        for number in numbers:
+            with open(os.path.join(path, _part_name(number)), "rb") as part_file:
+                shutil.copyfileobj(part_file, assembled, length=1024 * 1024)
+
+    discard(session_id)
+    return assembled.name, file_name
+
+
+def discard(session_id: str):
+    """
+    Deletes a session and every part it holds.
+    """
+    shutil.rmtree(_session_path(session_id), ignore_errors=True)
+
+
+def sweep_sessions(ttl_seconds: int = None) -> int:
+    """
+    Discards sessions created more than ttl_seconds (default
+    UPLOAD_SESSION_TTL_SECONDS) ago, so abandoned parts do not fill the
+    staging dir. Directories without readable metadata are left alone.
+    Returns the number of sessions removed.
+    """
+    ttl_seconds = UPLOAD_SESSION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    if not os.path.isdir(UPLOAD_STAGING_DIR):
+        return 0
+
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    removed = 0
+    for session_id in os.listdir(UPLOAD_STAGING_DIR):
+        try:
+            with open(os.path.join(_session_path(session_id), "meta.json")) as meta_file:
+                created_at = datetime.fromisoformat(json.load(meta_file)["created_at"])
+        except (LookupError, OSError, ValueError, KeyError):
+            continue
+        if created_at < cutoff:
+            discard(session_id)
+            removed += 1
+    if removed:
+        logger.info(f"Swept {removed} expired upload sessions")
+    return removed
+
+
+def _session_path(session_id: str) -> str:
+    # Only well-formed UUIDs map to a directory, so IDs cannot escape the staging dir
+    try:
+        UUID(session_id)
+    except ValueError:
+        raise LookupError(session_id)
+    path = os.path.join(UPLOAD_STAGING_DIR, session_id)
+    if not os.path.isfile(os.path.join(path, "meta.json")):
+        raise LookupError(session_id)
+    return path
+
+
+def _part_name(part_number: int) -> str:
+    return f"part-{part_number:05d}"
+
+
+def _part_numbers(path: str) -> list[int]:
+    return sorted(
+        int(name[len("part-"):])
+        for name in os.listdir(path)
+        if name.startswith("part-") and name[len("part-"):].isdigit()
+    )
@@ -1,6 +1,9 @@
 import logging
+import ipaddress
 import pandas as pd
 from fastapi.responses import JSONResponse
+from sqlalchemy import Boolean, Integer, Float
+from app.uploads import models
 
 
 logger = logging.getLogger(__name__)
@@ -22,13 +25,163 @@ EXPECTED_COLUMNS = [
     "previous_fraudulent_activity","account_fraud_reported","is_high_risk_behavior","label"
 ]
 
+# Low-cardinality text columns parsed as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    "customer_tier", "kyc_level", "transaction_currency", "transaction_type",
+    "merchant_category", "device_os", "device_type", "location_country",
+    "transaction_day_of_week",
+]
+
+
+def _transaction_dtypes() -> dict:
+    """
+    Parser dtypes for EXPECTED_COLUMNS. Low-cardinality text is read as
+    categoricals, numbers as float64 and 0/1 flags as float32, so the
+    validator gets numbers without a second coercion pass. Flags are not
+    int8: pandas wraps 300 to 44 instead of refusing it, and nullable Int64
+    parses about four times slower.
+    """
+    dtypes = {}
+    for name in EXPECTED_COLUMNS:
+        column_type = models.Transaction.__table__.columns[name].type
+        if name in CATEGORICAL_COLUMNS:
+            dtypes[name] = "category"
+        elif isinstance(column_type, Boolean):
+            dtypes[name] = "float32"
+        elif isinstance(column_type, (Integer, Float)):
+            dtypes[name] = "float64"
+        else:
+            dtypes[name] = str
+    return dtypes
+
+
+def _text_dtypes() -> dict:
+    """
+    Fallback dtypes for a chunk holding a value its TRANSACTION_DTYPES cannot
+    parse: every non-categorical column is text, so a stray token such as
+    "thirty" fails its row in validate_transaction_rows instead of the chunk.
+    """
+    return {name: "category" if name in CATEGORICAL_COLUMNS else str for name in EXPECTED_COLUMNS}
+
+
+TRANSACTION_DTYPES = _transaction_dtypes()
+
+TRANSACTION_TEXT_DTYPES = _text_dtypes()
+
+DAYS_OF_WEEK = {
+    "Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3,
+    "Friday": 4, "Saturday": 5, "Sunday": 6,
+}
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 0/1 flags stored as Boolean on the model
+FLAG_COLUMNS = [
+    name for name in EXPECTED_COLUMNS
+    if isinstance(models.Transaction.__table__.columns[name].type, Boolean)
+]
+
+# Numeric and flag columns, coerced in validate_transaction_rows when read as text
+NUMERIC_COLUMNS = [
+    name for name in EXPECTED_COLUMNS
+    if name != "transaction_day_of_week"
+    and isinstance(models.Transaction.__table__.columns[name].type, (Boolean, Integer, Float))
+]
+
+# Money columns that can never be below zero
+NON_NEGATIVE_COLUMNS = [
+    "transaction_amount", "prev_avg_txn_amount", "daily_avg_spend", "total_spend_last_7d",
+]
+
+
 def validate_csv_columns(df: pd.DataFrame):
     """
     Validates that all expected columns exist in the DataFrame.
     Returns a tuple: (is_valid: bool, missing_columns: list)
     """
-    missing_cols = [col for col in EXPECTED_COLUMNS if col not in df.columns]
+    return validate_csv_header(list(df.columns))
+
+
+def validate_csv_header(columns: list):
+    """
+    Validates that all expected columns appear in a header row.
+    Returns a tuple: (is_valid: bool, missing_columns: list)
+    """
+    present = set(columns)
+    missing_cols = [col for col in EXPECTED_COLUMNS if col not in present]
     if missing_cols:
         logger.warning(f"---Missing columns in CSV: {missing_cols}")
         return False, missing_cols
     return True, []
+
+
+def validate_transaction_rows(df: pd.DataFrame, check_ip: bool = False, enum_labels: dict = None):
+    """
+    Parses timestamp and transaction_day_of_week, then checks every row at
+    once with boolean masks. Missing values pass; only present values that
+    cannot be right are flagged, except transaction_id and timestamp, which
+    are required.
+    NUMERIC_COLUMNS read as text are coerced to numbers; a present value
+    that does not parse fails its row.
+    check_ip rejects ip_address values an INET column would refuse, and
+    enum_labels (column -> allowed labels) rejects labels an enum column
+    does not have.
+    Returns a tuple: (parsed chunk, DataFrame of failed checks with one bool
+    column per reason, indexed like the chunk).
+    """
+    df = df.copy()
+    raw_days = df["transaction_day_of_week"]
+    if not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", format=TIMESTAMP_FORMAT)
+
+    # Typed (Parquet/Arrow) uploads already carry day numbers, CSVs carry names
+    if pd.api.types.is_numeric_dtype(raw_days):
+        days = raw_days.astype("float64")
+        unknown_days = raw_days.notna() & ~days.isin(DAYS_OF_WEEK.values())
+    else:
+        days = raw_days.map(DAYS_OF_WEEK).astype("float64")
+        unknown_days = raw_days.notna() & days.isna()
+    df["transaction_day_of_week"] = days
+
+    transaction_ids = df["transaction_id"]
+    checks = {
+        "missing transaction_id": transaction_ids.isna() | (transaction_ids.astype("string").str.strip() == ""),
+        "unparseable timestamp": df["timestamp"].isna(),
+        "unknown transaction_day_of_week": unknown_days,
+    }
+
+    # Coerce once; a value present in the file but NaN after coercion is not a number
+    for name in NUMERIC_COLUMNS:
+        if pd.api.types.is_numeric_dtype(df[name]):
+            continue
+        values = pd.to_numeric(df[name], errors="coerce")
+        checks[f"{name} not a number"] = df[name].notna() & values.isna()
+        df[name] = values
+
+    # Range checks see the coerced values, so a non-number is only reported once
+    hours = df["transaction_hour"]
+    checks["transaction_hour outside 0-23"] = hours.notna() & ~hours.isin(range(24))
+
+    for name in FLAG_COLUMNS:
+        checks[f"{name} not 0/1"] = df[name].notna() & ~df[name].isin([0, 1])
+
+    for name in NON_NEGATIVE_COLUMNS:
+        checks[f"negative {name}"] = df[name] < 0
+
+    for name, labels in (enum_labels or {}).items():
+        checks[f"unknown {name}"] = df[name].notna() & ~df[name].isin(labels)
+
+    if check_ip:
+        ips = df["ip_address"].astype("string")
+        valid = {ip: _is_ip_address(ip) for ip in ips.dropna().unique()}
+        checks["invalid ip_address"] = ips.notna() & ~ips.map(valid).fillna(True).astype(bool)
+
+    return df, pd.DataFrame(checks, index=df.index)
+
+
+def _is_ip_address(value: str) -> bool:
+    try:
+        ipaddress.ip_interface(value)
+    except ValueError:
+        return False
+    return True
@@ -1,11 +1,21 @@
 import os
-from fastapi import FastAPI
-from app.core import database
-from app.uploads import models
+import logging
+from fastapi import FastAPI, Depends, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import database, metrics
+from app.uploads import models, jobs, partitions
+from app.uploads.services import get_transaction_id_cache_metrics
+from app.transactions import models as transaction_models  # registers the rollup tables
 from app.uploads.routers import router as uploads_router
+from app.transactions.routers import router as transactions_router
 from fastapi.middleware.cors import CORSMiddleware
 
 
+logger = logging.getLogger(__name__)
+
+
 # MODEL CREATION (for sqlite only)
 if os.getenv("DATABASE_URL", "").startswith("sqlite"):
     models.Base.metadata.create_all(bind=database.engine)
@@ -27,12 +37,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ROUTERS
 app.include_router(uploads_router)
+app.include_router(transactions_router)
+
+
+@app.on_event("startup")
+def check_transactions_partitioning():
+    # A schema that does not match the models must stop startup, not every insert
+    partitions.check_partitioning()
+
+
+@app.on_event("startup")
+def create_upcoming_partitions():
+    try:
+        partitions.ensure_upcoming_partitions()
+    except Exception as e:
+        # Ingest still creates any partition it needs, so startup goes on
+        logger.error(f"---Could not create upcoming partitions: {str(e)}")
+
+
+@app.on_event("shutdown")
+def shutdown_ingest_workers():
+    jobs.shutdown()
 
 
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy", "database": "connected"} 
\ No newline at end of file
+def health_check(db: Session = Depends(database.get_db)):
+    try:
+        db.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.error(f"---Health check query failed: {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "status": "unhealthy",
+                "database": "unavailable",
+                "pool": database.get_pool_metrics(),
+                "transaction_id_cache": get_transaction_id_cache_metrics(),
+            }
+        )
+
+    return {
+        "status": "healthy",
+        "database": "connected",
+        "pool": database.get_pool_metrics(),
+        "transaction_id_cache": get_transaction_id_cache_metrics(),
+    } 
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    # Prometheus text exposition format, version 0.0.4
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")